@@ -0,0 +1,109 @@
+"""Benchmark Quetzal CMem compression and restore on Lurking Horror's dynamic memory.
+
+Usage: python benchmarks/bench_cmem.py [story_file]
+"""
+
+from __future__ import annotations
+
+import sys
+import timeit
+from pathlib import Path
+
+from yazm import ZorkWebAdapter, quetzal
+
+STORY = Path(__file__).resolve().parent.parent / "stories" / "lurkinghorror.z3"
+COMMANDS = ["look", "inventory", "n", "s", "take all", "sit on chair", "stand", "examine pc"]
+
+
+def reference_compress_cmem(dynamic: bytes | bytearray, original: bytes | bytearray) -> bytes:
+    """The original byte-at-a-time implementation, kept for comparison."""
+    xor = bytes(a ^ b for a, b in zip(dynamic, original, strict=False))
+    end = len(xor)
+    while end > 0 and xor[end - 1] == 0:
+        end -= 1
+    xor = xor[:end]
+    result = bytearray()
+    i = 0
+    while i < len(xor):
+        b = xor[i]
+        if b != 0:
+            result.append(b)
+            i += 1
+        else:
+            run = 0
+            i += 1
+            while i < len(xor) and xor[i] == 0 and run < 255:
+                run += 1
+                i += 1
+            result.append(0x00)
+            result.append(run)
+    return bytes(result)
+
+
+def reference_decompress_cmem(cmem: bytes, original: bytes | bytearray) -> bytearray:
+    """The original decoder: fill an XOR buffer, then zip it with the original."""
+    xor = bytearray(len(original))
+    src = 0
+    dst = 0
+    while src < len(cmem) and dst < len(xor):
+        b = cmem[src]
+        src += 1
+        if b != 0:
+            xor[dst] = b
+            dst += 1
+        else:
+            if src < len(cmem):
+                count = cmem[src] + 1
+                src += 1
+            else:
+                count = 1
+            dst += count
+    return bytearray(a ^ b for a, b in zip(xor, original, strict=False))
+
+
+def reference_restore(zm, cmem: bytes):
+    dynamic = reference_decompress_cmem(cmem, zm.original_dynamic)
+    zm.memory[0 : len(dynamic)] = dynamic
+
+
+def report(name: str, func, number: int) -> float:
+    per_call = min(timeit.repeat(func, number=number, repeat=5)) / number
+    print(f"  {name:<12} {per_call * 1e6:10.1f} us/call")
+    return per_call
+
+
+def main():
+    story = Path(sys.argv[1]) if len(sys.argv) > 1 else STORY
+    adapter = ZorkWebAdapter(story.read_bytes())
+    adapter.get_intro()
+    for command in COMMANDS:
+        adapter.execute(command.split())
+    zm = adapter._zm
+
+    static_addr = zm.header.static_memory_addr
+    dynamic = bytes(zm.memory[0:static_addr])
+    original = zm.original_dynamic
+    compressed = quetzal._compress_cmem(dynamic, original)
+    assert compressed == reference_compress_cmem(dynamic, original), "fast path output differs"
+
+    print(f"{story.name}: dynamic memory {static_addr} bytes, CMem {len(compressed)} bytes")
+    print("compress:")
+    slow = report("reference", lambda: reference_compress_cmem(dynamic, original), 20)
+    fast = report("fast", lambda: quetzal._compress_cmem(dynamic, original), 500)
+    print(f"  speedup      {slow / fast:10.1f}x")
+
+    assert quetzal._decompress_cmem(compressed, original) == reference_decompress_cmem(compressed, original)
+    print("decompress:")
+    slow = report("reference", lambda: reference_decompress_cmem(compressed, original), 20)
+    fast = report("fast", lambda: quetzal._decompress_cmem(compressed, original), 500)
+    print(f"  speedup      {slow / fast:10.1f}x")
+
+    saved = zm.make_save_state(zm.pc)
+    print("restore (Quetzal):")
+    slow = report("reference", lambda: reference_restore(zm, compressed), 20)
+    fast = report("fast", lambda: zm.restore_state(saved), 500)
+    print(f"  speedup      {slow / fast:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Periodic background autosave checkpoints.
+
+An Autosaver attached to ``zm.autosaver`` is consulted by op_sread each time
+the player enters a command. Before the input is applied, the machine sits
+on the ``sread`` instruction with consistent state, so it is captured there
+(a memory copy and a Stks encode on the VM thread). The binary snapshot
+encoding, compression and the backend write happen on a background thread.
+Recovering a checkpoint re-executes the ``sread``, so play resumes at the
+prompt for the command that was being entered.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from . import snapshot
+from .saves import SaveBackend
+
+if TYPE_CHECKING:
+    from .zmachine import ZMachine
+
+
+class Autosaver:
+    """Checkpoint every ``every_turns`` commands and/or ``every_seconds`` seconds.
+
+    Pass None to disable either trigger. Only the newest checkpoint is kept,
+    under ``name`` in ``backend``.
+    """
+
+    def __init__(
+        self,
+        backend: SaveBackend,
+        name: str = "autosave",
+        every_turns: int | None = 10,
+        every_seconds: float | None = None,
+        compress: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if every_turns is None and every_seconds is None:
+            raise ValueError("Autosaver needs every_turns or every_seconds")
+        self.backend = backend
+        self.name = name
+        self.every_turns = every_turns
+        self.every_seconds = every_seconds
+        self.compress = compress
+        self._clock = clock
+        self._turns = 0
+        self._last_time = clock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yazm-autosave")
+        self._pending: list[Future] = []
+        self.checkpoints = 0  # checkpoints written so far
+
+    def due(self) -> bool:
+        if self.every_turns is not None and self._turns >= self.every_turns:
+            return True
+        return self.every_seconds is not None and self._clock() - self._last_time >= self.every_seconds
+
+    def on_input(self, zm: ZMachine, pc: int):
+        """Count a turn and checkpoint if one is due; ``pc`` is the sread instruction."""
+        self._turns += 1
+        if self.due():
+            self.checkpoint(zm, pc)
+
+    def checkpoint(self, zm: ZMachine, pc: int | None = None):
+        """Capture the current state now and write it in the background."""
+        state = snapshot.capture(zm)
+        if pc is not None:
+            state = state._replace(pc=pc)
+        self._turns = 0
+        self._last_time = self._clock()
+        self._pending = [f for f in self._pending if not f.done() or f.exception() is not None]
+        self._pending.append(self._executor.submit(self._write, zm, state))
+
+    def _write(self, zm: ZMachine, state: snapshot.CapturedState):
+        self.backend.write(self.name, snapshot.pack(zm, state, self.compress))
+        self.checkpoints += 1
+
+    def flush(self):
+        """Wait for queued checkpoints; re-raise the first write error, if any."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown()
+
+
+def recover(zm: ZMachine, backend: SaveBackend, name: str = "autosave") -> bool:
+    """Restore the latest checkpoint into ``zm``; return False if there is none."""
+    try:
+        data = backend.read(name)
+    except KeyError:
+        return False
+    zm.thaw_binary(data)
+    return True
@@ -73,6 +73,15 @@ class StatusLineType(IntFlag):
     time_based = 1
 
 
+class RunStatus(Enum):
+    """Why ZMachine.run() returned, or run_resumable() suspended."""
+
+    HALTED = 1  # the game quit
+    BUDGET = 2  # the instruction budget ran out; run() again to resume
+    DEADLINE = 3  # the wall-clock deadline passed; run() again to resume
+    INPUT = 4  # run_resumable() is suspended in sread; send() the input
+
+
 BASE_OPCODE_NAMES = {
     "OP2_1": "je",
     "OP2_2": "jl",
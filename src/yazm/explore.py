@@ -0,0 +1,309 @@
+"""Breadth-first exploration of a story's state space.
+
+Starting from a state waiting at a read, Explorer tries every command in
+its list, deduplicates the resulting states by ZMachine.state_hash() and
+queues the new ones, level by level. Each command runs on one working
+machine between checkpoint() and rollback(), so trying a command costs the
+instructions it executes plus the bytes it wrote. Frontier states are
+compressed binary snapshots (a few KB each) appended to a temporary file,
+so memory holds only the hashes of the states seen and a small record per
+queued state. The command graph is streamed to a tab-separated file, one edge per line:
+
+    parent hash    command    child hash    status
+
+with hashes in hex and status one of ``input``, ``halted`` or ``budget``
+(the command ran past ``max_instructions``; such children are not
+expanded). Default commands come from the story's own dictionary, using
+the Infocom part-of-speech flags; pass ``commands`` for other stories.
+
+States are compared exactly, so two paths that differ only in a move
+counter or score lead to different states.
+
+    python -m yazm.explore stories/minizork.z3 --max-states 1000 --graph graph.tsv
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import tempfile
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import NamedTuple, TextIO
+
+from .enums import RunStatus
+from .story import StoryImage, load_story
+from .zmachine import ZMachine
+from .zui_web import ZUIWeb
+
+# Infocom part-of-speech bits in the first data byte of a dictionary entry
+_PS_OBJECT = 0x80
+_PS_VERB = 0x40
+_PS_DIRECTION = 0x10
+_STATUS_NAMES = {RunStatus.INPUT: "input", RunStatus.HALTED: "halted", RunStatus.BUDGET: "budget"}
+
+
+def dictionary_commands(zm: ZMachine, pairs: bool = False) -> list[str]:
+    """Commands built from the dictionary: every direction and verb, plus each verb with each noun if ``pairs``."""
+    text_length = 4 if zm.version <= 3 else 6
+    directions, verbs, nouns = [], [], []
+    for word, addr in zm.dictionary.items():
+        if not word[:1].isalpha():  # punctuation and debugging verbs such as "#rand"
+            continue
+        flags = zm.memory[addr + text_length]
+        if flags & _PS_DIRECTION:
+            directions.append(word)
+        if flags & _PS_VERB:
+            verbs.append(word)
+        if flags & _PS_OBJECT:
+            nouns.append(word)
+    commands = directions + verbs
+    if pairs:
+        commands += [f"{verb} {noun}" for verb in verbs for noun in nouns]
+    return commands
+
+
+@dataclass
+class ExploreStats:
+    states: int = 0  # distinct states found, including the start
+    expanded: int = 0
+    transitions: int = 0  # commands run
+    halted: int = 0  # commands that ended the game
+    budget: int = 0  # commands stopped by max_instructions
+    depth: int = 0  # deepest level reached
+    seconds: float = 0.0
+
+    @property
+    def states_per_second(self) -> float:
+        return self.states / self.seconds if self.seconds else 0.0
+
+    @property
+    def transitions_per_second(self) -> float:
+        return self.transitions / self.seconds if self.seconds else 0.0
+
+
+class Transition(NamedTuple):
+    command: str
+    status: RunStatus
+    state_hash: int
+    output: str
+    snapshot: bytes | None  # the child state, if it waits for input and was wanted
+
+
+class Frontier:
+    """FIFO queue of (snapshot, state hash, depth); the snapshots are kept in a temporary file.
+
+    Memory holds one record of four ints per queued state (about 180 bytes);
+    the file is emptied whenever the queue runs dry.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()  # noqa: SIM115 -- closed by close() / __exit__
+        self._end = 0
+        # (file offset, snapshot length, state hash, depth)
+        self._queue: deque[tuple[int, int, int, int]] = deque()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def __bool__(self) -> bool:
+        return bool(self._queue)
+
+    def __enter__(self) -> Frontier:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._queue.clear()
+        self._file.close()
+
+    def append(self, snapshot: bytes, state_hash: int, depth: int):
+        self._file.seek(self._end)
+        self._file.write(snapshot)
+        self._queue.append((self._end, len(snapshot), state_hash, depth))
+        self._end += len(snapshot)
+
+    def popleft(self) -> tuple[bytes, int, int]:
+        offset, length, state_hash, depth = self._queue.popleft()
+        self._file.seek(offset)
+        snapshot = self._file.read(length)
+        if not self._queue:
+            self.clear()
+        return snapshot, state_hash, depth
+
+    def clear(self):
+        self._queue.clear()
+        self._file.truncate(0)
+        self._end = 0
+
+
+def start_state(story: StoryImage) -> bytes:
+    """Binary snapshot of a new game at its first read."""
+    zm = ZMachine(story)
+    zm.ui = ZUIWeb()
+    vm = zm.run_resumable()
+    if next(vm) is not RunStatus.INPUT:
+        raise ValueError("Story ended before asking for input")
+    vm.close()
+    return zm.freeze_binary()
+
+
+class Explorer:
+    """Breadth-first search over the states reachable from ``start`` (default: the first prompt)."""
+
+    def __init__(
+        self,
+        story_data: bytes | StoryImage,
+        start: bytes | None = None,
+        commands: Iterable[str] | None = None,
+        max_instructions: int = 1_000_000,
+    ):
+        self.story = story_data if isinstance(story_data, StoryImage) else load_story(bytes(story_data))
+        self.start = start if start is not None else start_state(self.story)
+        self.zm = ZMachine(self.story)
+        self.ui = ZUIWeb()
+        self.zm.ui = self.ui
+        self.commands = list(commands) if commands is not None else dictionary_commands(self.zm)
+        self.max_instructions = max_instructions
+        self.stats = ExploreStats()
+
+    def _run_command(self, command: str) -> RunStatus:
+        vm = self.zm.run_resumable(self.max_instructions)
+        try:
+            status = next(vm)  # enters the read the machine is waiting at
+            if status is RunStatus.INPUT:
+                status = vm.send(command)
+        except StopIteration:
+            status = RunStatus.HALTED
+        finally:
+            vm.close()
+        return status
+
+    def expand(self, snapshot: bytes, want: Callable[[int], bool] = lambda state_hash: True) -> list[Transition]:
+        """Try every command from a state; snapshot the children that wait for input and ``want`` accepts."""
+        zm = self.zm
+        zm.thaw_binary(snapshot)
+        self.ui.get_output()
+        zm.checkpoint()
+        transitions = []
+        try:
+            for command in self.commands:
+                status = self._run_command(command)
+                state_hash = zm.state_hash()
+                child = zm.freeze_binary() if status is RunStatus.INPUT and want(state_hash) else None
+                transitions.append(Transition(command, status, state_hash, self.ui.get_output(), child))
+                zm.rollback()
+        finally:
+            zm.release_checkpoint()
+        return transitions
+
+    def replay(self, snapshot: bytes, commands: Iterable[str]) -> list[Transition]:
+        """Play commands in sequence from a state; stops early if the game ends or a command runs too long."""
+        zm = self.zm
+        zm.thaw_binary(snapshot)
+        self.ui.get_output()
+        transitions = []
+        for command in commands:
+            status = self._run_command(command)
+            transitions.append(Transition(command, status, zm.state_hash(), self.ui.get_output(), None))
+            if status is not RunStatus.INPUT:
+                break
+        return transitions
+
+    def state_hash(self, snapshot: bytes) -> int:
+        self.zm.thaw_binary(snapshot)
+        return self.zm.state_hash()
+
+    def run(
+        self,
+        max_states: int | None = None,
+        max_depth: int | None = None,
+        graph: TextIO | None = None,
+        progress: Callable[[ExploreStats], None] | None = None,
+    ) -> ExploreStats:
+        """Explore until the frontier is empty or a limit is hit; write edges to ``graph`` if given.
+
+        ``progress`` is called with the running stats after each expanded state.
+
+        Memory grows by about 80 bytes per distinct state found (its hash in
+        the seen set) plus about 180 bytes per state waiting in the frontier;
+        the frontier's snapshots go to a temporary file, which needs a few
+        KB of disk per waiting state.
+        """
+        stats = self.stats = ExploreStats()
+        started = time.perf_counter()
+        root = self.state_hash(self.start)
+        seen = {root}
+        stats.states = 1
+
+        def want(state_hash: int) -> bool:
+            # claim new states as they are found, so duplicates within one expansion are skipped too
+            if state_hash in seen or (max_states is not None and len(seen) >= max_states):
+                return False
+            seen.add(state_hash)
+            return True
+
+        with Frontier() as frontier:
+            frontier.append(self.start, root, 0)
+            while frontier and (max_states is None or stats.states < max_states):
+                snapshot, parent, depth = frontier.popleft()
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                for t in self.expand(snapshot, want):
+                    stats.transitions += 1
+                    if t.status is RunStatus.HALTED:
+                        stats.halted += 1
+                    elif t.status is RunStatus.BUDGET:
+                        stats.budget += 1
+                    if graph is not None:
+                        graph.write(f"{parent:016x}\t{t.command}\t{t.state_hash:016x}\t{_STATUS_NAMES[t.status]}\n")
+                    if t.snapshot is not None:
+                        frontier.append(t.snapshot, t.state_hash, depth + 1)
+                        stats.depth = max(stats.depth, depth + 1)
+                stats.states = len(seen)
+                stats.expanded += 1
+                stats.seconds = time.perf_counter() - started
+                if progress is not None:
+                    progress(stats)
+        stats.seconds = time.perf_counter() - started
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Breadth-first exploration of a story's state space")
+    parser.add_argument("story_file", help="path to a Z-machine story file")
+    parser.add_argument("--max-states", type=int, default=None)
+    parser.add_argument("--max-depth", type=int, default=None)
+    parser.add_argument("--graph", help="write the command graph to this TSV file")
+    parser.add_argument("--pairs", action="store_true", help="also try every verb with every noun")
+    parser.add_argument("--commands", help="file with one command per line instead of the dictionary")
+    args = parser.parse_args()
+
+    with open(args.story_file, "rb") as f:
+        story = load_story(f.read())
+    commands = None
+    if args.commands:
+        with open(args.commands) as f:
+            commands = [line.strip() for line in f if line.strip()]
+    elif args.pairs:
+        commands = dictionary_commands(ZMachine(story), pairs=True)
+    explorer = Explorer(story, commands=commands)
+
+    def report(stats: ExploreStats):
+        if stats.expanded % 100 == 0:
+            print(f"{stats.states} states, depth {stats.depth}, {stats.states_per_second:.1f} states/s", flush=True)
+
+    with open(args.graph, "w") if args.graph else contextlib.nullcontext() as graph:
+        stats = explorer.run(args.max_states, args.max_depth, graph, report)
+    print(
+        f"{stats.states} states ({stats.expanded} expanded, {stats.transitions} commands) in {stats.seconds:.1f} s: "
+        f"{stats.states_per_second:.1f} states/s, {stats.transitions_per_second:.1f} commands/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
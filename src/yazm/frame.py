@@ -59,6 +59,15 @@ class Frame:
         new_frame.stack = stack
         return new_frame
 
+    def copy(self) -> Frame:
+        new_frame = Frame.__new__(Frame)
+        new_frame.stack = list(self.stack)
+        new_frame.locals = list(self.locals)
+        new_frame.arg_count = self.arg_count
+        new_frame.resume = self.resume
+        new_frame.store = self.store
+        return new_frame
+
     def read_local(self, index: int) -> int:
         return self.locals[index]
 
@@ -0,0 +1,118 @@
+"""Bounded, delta-encoded undo/redo history.
+
+The newest state is kept whole. Each older state is stored as a CMem diff
+against the state pushed after it, so a turn that changed a dozen bytes
+costs a few dozen bytes of history. Oldest entries are evicted once the
+depth or byte budget is exceeded.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple
+
+from .frame import Frame
+from .quetzal import _compress_cmem, _decompress_cmem, _sparse_cmem, pack_stks, parse_stks
+
+
+class HistoryEntry(NamedTuple):
+    pc: int
+    size: int  # bytes held for this entry (memory or diff, plus frames)
+
+
+class _State(NamedTuple):
+    pc: int
+    stks: bytes
+    cmem: bytes | None = None  # diff against the next newer state; None for the newest
+
+    def size(self, head: bytes) -> int:
+        return len(self.stks) + (len(head) if self.cmem is None else len(self.cmem))
+
+
+class UndoHistory:
+    """Stack of saved machine states with a depth limit and a byte budget."""
+
+    def __init__(self, max_depth: int = 100, max_bytes: int = 1 << 20):
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self._states: list[_State] = []
+        self._head = b""  # dynamic memory of the newest state
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def __bool__(self) -> bool:
+        return bool(self._states)
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes held by all entries (memory images, diffs and frames)."""
+        return self._bytes
+
+    def entries(self) -> list[HistoryEntry]:
+        """List entries from oldest to newest."""
+        return [HistoryEntry(state.pc, state.size(self._head)) for state in self._states]
+
+    def copy(self) -> UndoHistory:
+        """Cheap snapshot of the history; entries are immutable and shared."""
+        other = UndoHistory(self.max_depth, self.max_bytes)
+        other._states = list(self._states)
+        other._head = self._head
+        other._bytes = self._bytes
+        return other
+
+    def push(self, memory: bytes | bytearray, pc: int, frames: list[Frame], changes: dict[int, int] | None = None):
+        """Save a state. ``memory`` is the dynamic memory to record.
+
+        ``changes`` may map every address that differs from the newest entry
+        to its value there (as ZData.journal_changes returns); the delta is
+        then built from those addresses alone instead of a full compare.
+        """
+        memory = bytes(memory)
+        if self._states:
+            newest = self._states[-1]
+            self._bytes -= newest.size(self._head)
+            if changes is None:
+                cmem = _compress_cmem(self._head, memory)
+            else:
+                cmem = _sparse_cmem({addr: old ^ memory[addr] for addr, old in changes.items() if old != memory[addr]})
+            newest = self._states[-1] = newest._replace(cmem=cmem)
+            self._bytes += newest.size(self._head)
+        state = _State(pc, pack_stks(frames))
+        self._states.append(state)
+        self._head = memory
+        self._bytes += state.size(memory)
+        self._evict()
+
+    def pop(self) -> tuple[bytes, int, list[Frame]]:
+        """Remove the newest state and return (memory, pc, frames)."""
+        if not self._states:
+            raise IndexError("pop from empty history")
+        state = self._states.pop()
+        memory = self._head
+        self._bytes -= state.size(memory)
+        if self._states:
+            newest = self._states[-1]
+            assert newest.cmem is not None
+            self._bytes -= newest.size(memory)
+            self._head = bytes(_decompress_cmem(newest.cmem, memory))
+            newest = self._states[-1] = newest._replace(cmem=None)
+            self._bytes += newest.size(self._head)
+        else:
+            self._head = b""
+        return memory, state.pc, parse_stks(state.stks)
+
+    def clear(self):
+        self._states.clear()
+        self._head = b""
+        self._bytes = 0
+
+    def _evict(self):
+        """Drop the oldest states until both limits hold; the newest survives the byte budget."""
+        states = self._states
+        while states and (len(states) > self.max_depth or (len(states) > 1 and self._bytes > self.max_bytes)):
+            oldest = states.pop(0)
+            self._bytes -= oldest.size(self._head)
+        if not states:
+            self._head = b""
+            self._bytes = 0
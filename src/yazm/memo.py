@@ -0,0 +1,126 @@
+"""Memoize command responses by machine state.
+
+The VM is deterministic: from the same dynamic memory, pc, frames and RNG
+state, the same command always prints the same text and leads to the same
+next state. ResponseCache maps (state hash, command) to that output plus the
+turn's effect on the state, so a command already seen from a known state
+(``look`` right after the intro, say) is answered without running any
+instructions. Entries are kept in LRU order within an entry and byte budget.
+
+Only turns that depend on nothing but the machine state may be stored:
+ZorkWebAdapter leaves the cache out while a save backend, an autosaver or
+object tracking is configured, and never stores a turn that loaded state
+from a save or the undo history, or that ended the game.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, NamedTuple
+
+from .quetzal import _apply_cmem, _compress_cmem, pack_stks, parse_stks
+from .snapshot import _RNG_WORDS
+
+if TYPE_CHECKING:
+    from .zmachine import ZMachine
+
+
+@dataclass
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class Response(NamedTuple):
+    """A turn's output and the state it left behind."""
+
+    output: str
+    cmem: bytes  # dynamic memory after the turn, as a CMem diff against before it
+    pc: int
+    stks: bytes
+    rng_state: tuple[int, bytes, float | None]  # version, packed words, gauss_next
+
+    @property
+    def size(self) -> int:
+        return len(self.output) + len(self.cmem) + len(self.stks) + len(self.rng_state[1])
+
+
+def record(zm: ZMachine, before: bytes, output: str) -> Response:
+    """Describe the turn that took the machine from dynamic memory ``before`` to its current state."""
+    after = zm.memory[0 : zm.story.static_memory_addr]
+    rng_version, words, gauss_next = zm.rng.getstate()
+    return Response(
+        output,
+        _compress_cmem(after, before),
+        zm.pc,
+        pack_stks(zm.frames),
+        (rng_version, _RNG_WORDS.pack(*words), gauss_next),
+    )
+
+
+def apply(zm: ZMachine, response: Response):
+    """Put the machine in the state a response was recorded in; it must be in the turn's starting state."""
+    _apply_cmem(response.cmem, zm.memory, zm.memory)
+    zm.pc = response.pc
+    zm.frames = parse_stks(response.stks)
+    rng_version, words, gauss_next = response.rng_state
+    zm.rng.setstate((rng_version, _RNG_WORDS.unpack(words), gauss_next))
+
+
+class ResponseCache:
+    """Bounded LRU map of (state hash, command) to Response; safe to share between threads."""
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 32 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = MemoStats()
+        self._entries: OrderedDict[tuple[int, str], Response] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory_usage(self) -> int:
+        """Bytes held by the stored responses."""
+        return self._bytes
+
+    def get(self, state_hash: int, command: str) -> Response | None:
+        key = (state_hash, command)
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return response
+
+    def put(self, state_hash: int, command: str, response: Response):
+        key = (state_hash, command)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._entries[key] = response
+            self._bytes += response.size
+            self.stats.stores += 1
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,133 @@
+"""Turn-level object-state diffs.
+
+Compares two images of dynamic memory and reports which objects moved,
+which attributes flipped and which property values changed. Rather than
+walking every object, the object table and property table regions are
+XORed as whole integers and only the non-zero bytes of the diff are mapped
+back to (object, field) positions.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .zmachine import ZMachine
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+@dataclass
+class ObjectChange:
+    number: int
+    name: str = ""
+    parent: tuple[int, int] | None = None  # (old, new) when the object moved
+    attributes_set: list[int] = field(default_factory=list)
+    attributes_cleared: list[int] = field(default_factory=list)
+    properties: dict[int, tuple[int | bytes, int | bytes]] = field(default_factory=dict)
+
+
+class ObjectLayout:
+    """Address map of the object table and property tables.
+
+    Property sizes never change at runtime, so the map is built once per
+    story and reused for every diff.
+    """
+
+    def __init__(self, zm: ZMachine):
+        self.obj_size = zm.obj_size
+        self.attr_width = zm.attr_width
+        self.parent_width = 1 if zm.version <= 3 else 2
+        self.obj_start = zm.header.obj_table_addr
+        self.obj_count = zm.get_total_object_count()
+        self.obj_end = self.obj_start + self.obj_count * self.obj_size
+
+        # (data_addr, length, obj_id, prop_number) sorted by address
+        props: list[tuple[int, int, int, int]] = []
+        for obj_id in range(1, self.obj_count + 1):
+            addr = zm.get_object_prop_table_addr(obj_id)
+            prop = zm.read_object_prop(addr + zm.memory.u8(addr) * 2 + 1)
+            while prop.number != 0:
+                props.append((prop.addr, prop.length, obj_id, prop.number))
+                prop = zm.read_object_prop(prop.next_)
+        props.sort()
+        self.props = props
+        self.prop_addrs = [p[0] for p in props]
+        self.prop_start = props[0][0] if props else self.obj_end
+        self.prop_end = props[-1][0] + props[-1][1] if props else self.obj_end
+
+    def find_prop(self, addr: int) -> tuple[int, int, int, int] | None:
+        """Return the property entry whose data contains ``addr``, if any."""
+        i = bisect_right(self.prop_addrs, addr) - 1
+        if i < 0:
+            return None
+        entry = self.props[i]
+        return entry if addr < entry[0] + entry[1] else None
+
+
+def _changed_addrs(before: bytes | bytearray, after: bytes | bytearray, start: int, end: int) -> list[int]:
+    """Return the addresses in [start, end) whose bytes differ."""
+    if end <= start:
+        return []
+    xor = int.from_bytes(before[start:end], "big") ^ int.from_bytes(after[start:end], "big")
+    if not xor:
+        return []
+    diff = xor.to_bytes(end - start, "big")
+    return [start + m.start() for m in _NONZERO.finditer(diff)]
+
+
+def _value(data: bytes | bytearray, addr: int, length: int) -> int | bytes:
+    if length == 1:
+        return data[addr]
+    if length == 2:
+        return data[addr] << 8 | data[addr + 1]
+    return bytes(data[addr : addr + length])
+
+
+def diff_objects(zm: ZMachine, before: bytes | bytearray, after: bytes | bytearray) -> list[ObjectChange]:
+    """Diff the object state held in two dynamic-memory images.
+
+    Returns one ObjectChange per affected object, ordered by object number.
+    """
+    layout = zm.object_layout
+    changes: dict[int, ObjectChange] = {}
+
+    def change_for(obj_id: int) -> ObjectChange:
+        if obj_id not in changes:
+            changes[obj_id] = ObjectChange(obj_id)
+        return changes[obj_id]
+
+    parent_offset = layout.attr_width
+    for addr in _changed_addrs(before, after, layout.obj_start, layout.obj_end):
+        obj_id, offset = divmod(addr - layout.obj_start, layout.obj_size)
+        obj_id += 1
+        if offset < layout.attr_width:
+            flipped = before[addr] ^ after[addr]
+            for bit in range(8):
+                if flipped & (128 >> bit):
+                    if after[addr] & (128 >> bit):
+                        change_for(obj_id).attributes_set.append(offset * 8 + bit)
+                    else:
+                        change_for(obj_id).attributes_cleared.append(offset * 8 + bit)
+        elif parent_offset <= offset < parent_offset + layout.parent_width:
+            parent_addr = addr - offset + parent_offset
+            old = _value(before, parent_addr, layout.parent_width)
+            new = _value(after, parent_addr, layout.parent_width)
+            change_for(obj_id).parent = (old, new)
+
+    for addr in _changed_addrs(before, after, layout.prop_start, layout.prop_end):
+        entry = layout.find_prop(addr)
+        if entry is None:
+            continue
+        data_addr, length, obj_id, number = entry
+        change = change_for(obj_id)
+        if number not in change.properties:
+            change.properties[number] = (_value(before, data_addr, length), _value(after, data_addr, length))
+
+    result = [changes[n] for n in sorted(changes)]
+    for change in result:
+        change.name = zm.get_object_name(change.number)
+    return result
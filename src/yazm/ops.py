@@ -406,13 +406,19 @@ def op_put_prop(zm: ZMachine, instr: Instruction, args: list[int]):
 # --- Input ---
 
 
-def op_sread(zm: ZMachine, instr: Instruction, args: list[int]):
-    """read input, tokenise"""
+def sread_prepare(zm: ZMachine, instr: Instruction, args: list[int]):
+    """first half of sread: the work done before waiting for input"""
     zm.update_status_bar()
+
+
+def sread_complete(zm: ZMachine, instr: Instruction, args: list[int], input_str: str):
+    """second half of sread: store and tokenise the input"""
+    if zm.autosaver is not None:
+        # nothing has been written for this command yet, so state is consistent
+        zm.autosaver.on_input(zm, instr.addr)
     text_addr = args[0]
     parse_addr = args[1]
     max_len = zm.memory.u8(text_addr)
-    input_str = zm.ui.zinput()
     input_str = input_str.lower()[:max_len]
     # Write text to buffer (v1-4 format: starts at byte 1, terminated by 0)
     for i, ch in enumerate(input_str):
@@ -422,6 +428,12 @@ def op_sread(zm: ZMachine, instr: Instruction, args: list[int]):
     zm.pc = instr.next_
 
 
+def op_sread(zm: ZMachine, instr: Instruction, args: list[int]):
+    """read input, tokenise"""
+    sread_prepare(zm, instr, args)
+    sread_complete(zm, instr, args, zm.ui.zinput())
+
+
 def op_show_status(zm: ZMachine, instr: Instruction, args: list[int]):
     """show status bar"""
     zm.update_status_bar()
@@ -466,9 +478,7 @@ def op_save(zm: ZMachine, instr: Instruction, args: list[int]):
             resume_pc = instr.branch.address
         else:
             resume_pc = instr.next_
-        data = zm.make_save_state(resume_pc)
-        with open(filename, "wb") as f:
-            f.write(data)
+        zm.save_backend.write(filename, zm.make_save_state(resume_pc))
         zm.process_branch(instr.branch, instr.next_, True)
     except Exception:
         zm.process_branch(instr.branch, instr.next_, False)
@@ -481,9 +491,7 @@ def op_restore(zm: ZMachine, instr: Instruction, args: list[int]):
         if not filename:
             zm.process_branch(instr.branch, instr.next_, False)
             return
-        with open(filename, "rb") as f:
-            data = f.read()
-        zm.restore_state(data)
+        zm.restore_state(zm.save_backend.read(filename))
         # On success, execution resumes at the saved PC (set by restore_state)
     except Exception:
         zm.process_branch(instr.branch, instr.next_, False)
@@ -492,9 +500,7 @@ def op_restore(zm: ZMachine, instr: Instruction, args: list[int]):
 def op_save_undo(zm: ZMachine, instr: Instruction, args: list[int]):
     """save undo state"""
     try:
-        state = zm.make_save_state(instr.next_)
-        zm.undos.append(state)
-        zm.redos.clear()
+        zm.save_undo(instr.next_)
         zm.process_result(instr, 1)
     except Exception:
         zm.process_result(instr, 0)
@@ -506,8 +512,7 @@ def op_restore_undo(zm: ZMachine, instr: Instruction, args: list[int]):
         zm.process_result(instr, 0)
         return
     try:
-        state = zm.undos.pop()
-        zm.restore_state(state)
+        zm.pop_state(zm.undos)
         # On success, execution resumes at the saved PC (set by restore_state)
     except Exception:
         zm.process_result(instr, 0)
@@ -516,7 +521,7 @@ def op_restore_undo(zm: ZMachine, instr: Instruction, args: list[int]):
 def op_restart(zm: ZMachine, instr: Instruction, args: list[int]):
     """restart the game"""
     static_addr = zm.header.static_memory_addr
-    zm.memory[0:static_addr] = zm.original_memory[0:static_addr]
+    zm.memory.write_bulk(0, zm.original_memory[0:static_addr])
     zm.frames = [zm.frames[0]]
     zm.frames[0].empty()
     zm.pc = zm.initial_pc
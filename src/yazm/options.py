@@ -8,6 +8,12 @@ class Options:
     log_instructions: bool
     rand_seed: bytearray | list
     highlight_objects: bool = True
+    undo_depth: int = 100
+    undo_budget: int = 1 << 20  # bytes per undo/redo history
+    # journal memory writes so undo points cost O(writes); read when the ZMachine is
+    # constructed, so pass Options to ZMachine() or call zm.memory.start_journal() later
+    write_journal: bool = False
+    verify_state_hash: bool = False  # check every incremental state_hash() against a full rehash
 
     @classmethod
     def default(cls):
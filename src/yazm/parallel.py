@@ -0,0 +1,190 @@
+"""Run walkthrough replays and exploration across a pool of processes.
+
+The interpreter runs one instruction at a time under the GIL, so both jobs
+are spread over worker processes. Each worker receives the story and the
+start snapshot once, in the pool initializer, and keeps a single Explorer
+(one StoryImage and one working machine) for all its tasks; a task carries
+only a compact binary snapshot and a list of commands.
+
+Results stream back to the coordinator as tasks complete. The coordinator
+owns the set of state hashes seen so far, so duplicates found by different
+workers are merged there: replays record every state they pass through in
+``seen``, and explore() expands each distinct state once.
+
+    with ParallelRunner(story_data, workers=4) as runner:
+        for result in runner.replay([["north", "east"], ["open mailbox"]]):
+            ...
+        stats = runner.explore(max_states=10_000)
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from multiprocessing.context import BaseContext
+from typing import NamedTuple, TextIO
+
+from .enums import RunStatus
+from .explore import _STATUS_NAMES, Explorer, ExploreStats, Frontier, Transition, start_state
+from .story import load_story
+
+# the worker process's explorer, set up by _init_worker
+_explorer: Explorer | None = None
+# hashes this worker has already sent a snapshot for in exploration _sent_run;
+# the coordinator has those states, so they need not be sent again
+_sent: set[int] = set()
+_sent_run = 0
+
+
+def _init_worker(story_data: bytes, start: bytes, commands: list[str] | None, max_instructions: int):
+    global _explorer
+    _explorer = Explorer(load_story(story_data), start, commands, max_instructions)
+
+
+def _root_hash() -> int:
+    assert _explorer is not None
+    return _explorer.state_hash(_explorer.start)
+
+
+def _replay_task(index: int, start: bytes | None, commands: list[str]) -> ReplayResult:
+    assert _explorer is not None
+    return ReplayResult(index, _explorer.replay(start or _explorer.start, commands))
+
+
+def _expand_task(run: int, snapshot: bytes, state_hash: int, depth: int) -> tuple[int, int, list[Transition]]:
+    global _sent_run
+    assert _explorer is not None
+    if run != _sent_run:
+        _sent.clear()
+        _sent_run = run
+
+    def want(child: int) -> bool:
+        if child in _sent:
+            return False
+        _sent.add(child)
+        return True
+
+    # outputs are not needed for exploration; leave them out of the reply
+    transitions = [t._replace(output="") for t in _explorer.expand(snapshot, want)]
+    return state_hash, depth, transitions
+
+
+class ReplayResult(NamedTuple):
+    index: int  # position of the command sequence in the replay() argument
+    transitions: list[Transition]  # one per command played
+
+
+class ParallelRunner:
+    """A process pool for one story; see replay() and explore()."""
+
+    def __init__(
+        self,
+        story_data: bytes,
+        workers: int | None = None,
+        start: bytes | None = None,
+        commands: Iterable[str] | None = None,
+        max_instructions: int = 1_000_000,
+        mp_context: BaseContext | None = None,
+    ):
+        story_data = bytes(story_data)
+        self.start = start if start is not None else start_state(load_story(story_data))
+        self.workers = workers or multiprocessing.cpu_count()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(story_data, self.start, list(commands) if commands is not None else None, max_instructions),
+        )
+        # every state hash seen by replays and explorations of this runner
+        self.seen: set[int] = set()
+        self._runs = 0
+
+    def __enter__(self) -> ParallelRunner:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown(cancel_futures=True)
+
+    def replay(self, sequences: Iterable[Sequence[str]], start: bytes | None = None) -> Iterator[ReplayResult]:
+        """Play each command sequence from ``start`` (default: the runner's start); yield results as they finish."""
+        futures = [
+            self._pool.submit(_replay_task, index, start, list(commands)) for index, commands in enumerate(sequences)
+        ]
+        try:
+            for future in as_completed(futures):
+                result = future.result()
+                self.seen.update(t.state_hash for t in result.transitions)
+                yield result
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def explore(
+        self,
+        max_states: int | None = None,
+        max_depth: int | None = None,
+        graph: TextIO | None = None,
+        progress: Callable[[ExploreStats], None] | None = None,
+    ) -> ExploreStats:
+        """Breadth-first exploration from the start state, as Explorer.run() but expanding states in parallel.
+
+        States are expanded roughly level by level; with several workers a
+        deeper state may be expanded before the last of a shallower level.
+        Memory is bounded as for Explorer.run(): the coordinator's frontier
+        keeps its snapshots in a temporary file.
+        """
+        stats = ExploreStats()
+        started = time.perf_counter()
+        self._runs += 1
+        root = self._pool.submit(_root_hash).result()
+        seen = {root}
+        self.seen.add(root)
+        pending: set[Future] = set()
+
+        def full() -> bool:
+            return max_states is not None and len(seen) >= max_states
+
+        with Frontier() as frontier:
+            frontier.append(self.start, root, 0)
+            while frontier or pending:
+                while frontier and len(pending) < self.workers and not full():  # one expansion per worker
+                    snapshot, state_hash, depth = frontier.popleft()
+                    if max_depth is None or depth < max_depth:
+                        pending.add(self._pool.submit(_expand_task, self._runs, snapshot, state_hash, depth))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future.cancelled():
+                        continue
+                    parent, depth, transitions = future.result()
+                    for t in transitions:
+                        stats.transitions += 1
+                        if t.status is RunStatus.HALTED:
+                            stats.halted += 1
+                        elif t.status is RunStatus.BUDGET:
+                            stats.budget += 1
+                        if graph is not None:
+                            graph.write(f"{parent:016x}\t{t.command}\t{t.state_hash:016x}\t{_STATUS_NAMES[t.status]}\n")
+                        if t.snapshot is not None and t.state_hash not in seen and not full():
+                            seen.add(t.state_hash)
+                            frontier.append(t.snapshot, t.state_hash, depth + 1)
+                            stats.depth = max(stats.depth, depth + 1)
+                    stats.expanded += 1
+                    stats.states = len(seen)
+                    stats.seconds = time.perf_counter() - started
+                    if progress is not None:
+                        progress(stats)
+                if full():
+                    for future in pending:
+                        future.cancel()
+                    frontier.clear()
+        self.seen.update(seen)
+        stats.states = len(seen)
+        stats.seconds = time.perf_counter() - started
+        return stats
@@ -5,10 +5,12 @@ Implements the standard Quetzal 1.4 format with CMem (compressed memory) chunks.
 
 from __future__ import annotations
 
+import re
 import struct
 from typing import TYPE_CHECKING
 
 from .frame import Frame
+from .zdata import ZData
 
 if TYPE_CHECKING:
     from .zmachine import ZMachine
@@ -37,54 +39,82 @@ def _parse_chunks(data: bytes) -> dict[bytes, bytes]:
     return chunks
 
 
+_ZERO_RUN = re.compile(rb"\x00+")
+
+
 def _compress_cmem(dynamic: bytes | bytearray, original: bytes | bytearray) -> bytes:
-    """XOR dynamic against original, then run-length compress trailing zeros."""
-    xor = bytes(a ^ b for a, b in zip(dynamic, original, strict=False))
-    # Trim trailing zeros from XOR diff
-    end = len(xor)
-    while end > 0 and xor[end - 1] == 0:
-        end -= 1
-    xor = xor[:end]
+    """XOR dynamic against original, then run-length compress zeros.
+
+    The XOR is done over whole buffers as big integers and zero runs are
+    located with a regex, so no Python-level loop touches individual bytes.
+    Each run of n zeros is written as ``0x00, n - 1``, split into chunks of at
+    most 256; trailing zeros are dropped.
+    """
+    length = min(len(dynamic), len(original))
+    xor = int.from_bytes(dynamic[:length], "big") ^ int.from_bytes(original[:length], "big")
+    diff = xor.to_bytes(length, "big").rstrip(b"\x00")
 
     result = bytearray()
-    i = 0
-    while i < len(xor):
-        b = xor[i]
-        if b != 0:
-            result.append(b)
-            i += 1
-        else:
-            # Count run of zeros
-            run = 0
-            i += 1
-            while i < len(xor) and xor[i] == 0 and run < 255:
-                run += 1
-                i += 1
-            result.append(0x00)
-            result.append(run)
+    pos = 0
+    for run in _ZERO_RUN.finditer(diff):
+        start, end = run.span()
+        result += diff[pos:start]
+        result += _zero_run(end - start)
+        pos = end
+    result += diff[pos:]
     return bytes(result)
 
 
-def _decompress_cmem(cmem: bytes, original: bytes | bytearray) -> bytearray:
-    """Decompress CMem data and XOR against original to reconstruct dynamic memory."""
-    xor = bytearray(len(original))
+def _zero_run(length: int) -> bytes:
+    """Encode a run of zeros: ``0x00, n - 1`` per chunk of at most 256."""
+    full, rest = divmod(length, 256)
+    return b"\x00\xff" * full + (bytes((0, rest - 1)) if rest else b"")
+
+
+def _sparse_cmem(diffs: dict[int, int]) -> bytes:
+    """Encode a sparse XOR diff {addr: non-zero xor byte} exactly as _compress_cmem would."""
+    result = bytearray()
+    pos = 0
+    for addr in sorted(diffs):
+        if addr > pos:
+            result += _zero_run(addr - pos)
+        result.append(diffs[addr])
+        pos = addr + 1
+    return bytes(result)
+
+
+def _apply_cmem(cmem: bytes, original: bytes | bytearray, target: ZData):
+    """Apply a CMem diff onto ``target``, which must already hold ``original``.
+
+    Literal runs are XORed against the original as big integers and written
+    with one slice assignment each; zero runs just advance the destination.
+    """
+    size = len(original)
     src = 0
     dst = 0
-    while src < len(cmem) and dst < len(xor):
-        b = cmem[src]
-        src += 1
-        if b != 0:
-            xor[dst] = b
-            dst += 1
+    while src < len(cmem) and dst < size:
+        zero = cmem.find(b"\x00", src)
+        if zero == -1:
+            zero = len(cmem)
+        if zero > src:
+            literal = cmem[src : min(zero, src + size - dst)]
+            length = len(literal)
+            xor = int.from_bytes(literal, "big") ^ int.from_bytes(original[dst : dst + length], "big")
+            target.write_bulk(dst, xor.to_bytes(length, "big"))
+            src = zero
+            dst += length
         else:
             # Zero byte followed by count of additional zeros
-            if src < len(cmem):
-                count = cmem[src] + 1  # the zero itself plus count extra
-                src += 1
-            else:
-                count = 1
-            dst += count  # already zero-filled
-    return bytearray(a ^ b for a, b in zip(xor, original, strict=False))
+            count = cmem[src + 1] + 1 if src + 1 < len(cmem) else 1
+            src += 2
+            dst += count
+
+
+def _decompress_cmem(cmem: bytes, original: bytes | bytearray) -> bytearray:
+    """Decompress CMem data and XOR against original to reconstruct dynamic memory."""
+    dynamic = ZData(original)
+    _apply_cmem(cmem, original, dynamic)
+    return dynamic
 
 
 def save(zm: ZMachine, pc: int) -> bytes:
@@ -104,22 +134,21 @@ def save(zm: ZMachine, pc: int) -> bytes:
     cmem_data = _compress_cmem(dynamic, zm.original_dynamic)
 
     # Stks chunk: concatenated frame data
-    stks_data = bytearray()
-    for frame in zm.frames:
-        stks_data.extend(frame.to_list())
+    stks_data = pack_stks(zm.frames)
 
     # Build FORM/IFZS container
     body = _write_chunk(b"IFhd", bytes(ifhd_data))
     body += _write_chunk(b"CMem", cmem_data)
-    body += _write_chunk(b"Stks", bytes(stks_data))
+    body += _write_chunk(b"Stks", stks_data)
 
     return b"FORM" + struct.pack(">I", len(body) + 4) + b"IFZS" + body
 
 
-def restore(zm: ZMachine, data: bytes):
-    """Parse a Quetzal IFF FORM/IFZS save file and restore ZMachine state.
+def _read_save(zm: ZMachine, data: bytes) -> tuple[int, dict[bytes, bytes]]:
+    """Validate a Quetzal save against the story.
 
-    Raises ValueError on format errors or mismatched story file.
+    Returns (pc, chunks). Raises ValueError on format errors or mismatched
+    story file.
     """
     if len(data) < 12:
         raise ValueError("Save file too short")
@@ -150,29 +179,53 @@ def restore(zm: ZMachine, data: bytes):
         raise ValueError(f"Checksum mismatch: save={checksum}, story={zm.header.checksum}")
 
     # Memory — CMem or UMem
-    static_addr = zm.header.static_memory_addr
-    if b"CMem" in chunks:
-        dynamic = _decompress_cmem(chunks[b"CMem"], zm.original_dynamic)
-    elif b"UMem" in chunks:
-        dynamic = bytearray(chunks[b"UMem"])
-    else:
+    if b"CMem" not in chunks and b"UMem" not in chunks:
         raise ValueError("Missing CMem or UMem chunk")
-
-    if len(dynamic) > static_addr:
+    if b"UMem" in chunks and len(chunks[b"UMem"]) > zm.header.static_memory_addr:
         raise ValueError("Restored dynamic memory too large")
 
+    return pc, chunks
+
+
+def load_dynamic(zm: ZMachine, data: bytes) -> bytearray:
+    """Return the dynamic memory stored in a Quetzal save without applying it."""
+    _, chunks = _read_save(zm, data)
+    if b"CMem" in chunks:
+        return _decompress_cmem(chunks[b"CMem"], zm.original_dynamic)
+    return bytearray(chunks[b"UMem"])
+
+
+def restore(zm: ZMachine, data: bytes):
+    """Parse a Quetzal IFF FORM/IFZS save file and restore ZMachine state.
+
+    Raises ValueError on format errors or mismatched story file.
+    """
+    pc, chunks = _read_save(zm, data)
+
     # Stks — reconstruct frames
     if b"Stks" not in chunks:
         raise ValueError("Missing Stks chunk")
-    frames = _parse_stks(chunks[b"Stks"])
+    frames = parse_stks(chunks[b"Stks"])
 
-    # Apply restored state
-    zm.memory[0 : len(dynamic)] = dynamic
+    # Apply restored state: CMem is decoded straight into memory
+    if b"CMem" in chunks:
+        zm.memory.write_bulk(0, zm.original_dynamic)
+        _apply_cmem(chunks[b"CMem"], zm.original_dynamic, zm.memory)
+    else:
+        zm.memory.write_bulk(0, chunks[b"UMem"])
     zm.pc = pc
     zm.frames = frames
 
 
-def _parse_stks(data: bytes) -> list[Frame]:
+def pack_stks(frames: list[Frame]) -> bytes:
+    """Pack frames into the Stks chunk layout."""
+    stks_data = bytearray()
+    for frame in frames:
+        stks_data.extend(frame.to_list())
+    return bytes(stks_data)
+
+
+def parse_stks(data: bytes) -> list[Frame]:
     """Parse the Stks chunk into a list of Frame objects."""
     frames = []
     pos = 0
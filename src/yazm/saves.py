@@ -0,0 +1,226 @@
+"""Pluggable storage for save files.
+
+op_save and op_restore hand the Quetzal bytes to ``zm.save_backend`` instead
+of opening files themselves. Backends implement read/write/delete/names;
+the async variants run the blocking calls on a worker thread so an asyncio
+host can persist saves without stalling its event loop.
+ThreadedSaveBackend goes one step further for the VM thread: writes are
+queued and return at once.
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+
+
+class SaveBackend(abc.ABC):
+    """Base class: a flat namespace of named save blobs."""
+
+    @abc.abstractmethod
+    def read(self, name: str) -> bytes:
+        """Return the save stored under ``name``; raise KeyError if missing."""
+
+    @abc.abstractmethod
+    def write(self, name: str, data: bytes) -> None:
+        """Store ``data`` under ``name``, replacing any previous save."""
+
+    @abc.abstractmethod
+    def delete(self, name: str) -> None:
+        """Remove the save stored under ``name``; raise KeyError if missing."""
+
+    @abc.abstractmethod
+    def names(self) -> list[str]:
+        """Names of all stored saves."""
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.names()
+
+    async def aread(self, name: str) -> bytes:
+        return await asyncio.to_thread(self.read, name)
+
+    async def awrite(self, name: str, data: bytes) -> None:
+        await asyncio.to_thread(self.write, name, data)
+
+    async def adelete(self, name: str) -> None:
+        await asyncio.to_thread(self.delete, name)
+
+
+class FileSaveBackend(SaveBackend):
+    """Saves as files under ``directory`` (absolute names are used as given).
+
+    Writes go to a temporary file in the target directory which is fsynced
+    and then renamed over the destination, so a crash mid-save leaves the
+    previous file intact.
+    """
+
+    def __init__(self, directory: str = ""):
+        self.directory = directory
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def read(self, name: str) -> bytes:
+        try:
+            with open(self.path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise KeyError(name) from None
+
+    def write(self, name: str, data: bytes) -> None:
+        path = self.path(name)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".yazm-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def delete(self, name: str) -> None:
+        try:
+            os.unlink(self.path(name))
+        except FileNotFoundError:
+            raise KeyError(name) from None
+
+    def names(self) -> list[str]:
+        directory = self.directory or "."
+        return sorted(
+            entry.name
+            for entry in os.scandir(directory)
+            if entry.is_file() and not (entry.name.startswith(".yazm-") and entry.name.endswith(".tmp"))
+        )
+
+    def __contains__(self, name: str) -> bool:
+        return os.path.isfile(self.path(name))
+
+
+class MemorySaveBackend(SaveBackend):
+    """Saves held in a dict; for tests and short-lived web sessions."""
+
+    def __init__(self):
+        self._saves: dict[str, bytes] = {}
+
+    def read(self, name: str) -> bytes:
+        return self._saves[name]
+
+    def write(self, name: str, data: bytes) -> None:
+        self._saves[name] = bytes(data)
+
+    def delete(self, name: str) -> None:
+        del self._saves[name]
+
+    def names(self) -> list[str]:
+        return sorted(self._saves)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._saves
+
+
+class SQLiteSaveBackend(SaveBackend):
+    """Saves as rows of a single SQLite table, each write in its own transaction."""
+
+    def __init__(self, path: str, table: str = "saves"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.table = table
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(f"CREATE TABLE IF NOT EXISTS {table} (name TEXT PRIMARY KEY, data BLOB NOT NULL)")
+
+    def read(self, name: str) -> bytes:
+        with self._lock:
+            row = self._db.execute(f"SELECT data FROM {self.table} WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def write(self, name: str, data: bytes) -> None:
+        with self._lock, self._db:
+            self._db.execute(f"INSERT OR REPLACE INTO {self.table} (name, data) VALUES (?, ?)", (name, bytes(data)))
+
+    def delete(self, name: str) -> None:
+        with self._lock, self._db:
+            if self._db.execute(f"DELETE FROM {self.table} WHERE name = ?", (name,)).rowcount == 0:
+                raise KeyError(name)
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._db.execute(f"SELECT name FROM {self.table} ORDER BY name")]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+class ThreadedSaveBackend(SaveBackend):
+    """Wraps another backend so writes return immediately.
+
+    Writes are queued in order and performed by one daemon thread. Reads,
+    deletes and listings wait for queued writes first, so they always see
+    the latest save. A failed write is re-raised by the next call to
+    ``flush()``.
+    """
+
+    def __init__(self, backend: SaveBackend):
+        self.backend = backend
+        self._queue: queue.Queue[tuple[str, bytes] | None] = queue.Queue()
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(target=self._worker, name="yazm-save-writer", daemon=True)
+        self._thread.start()
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self.backend.write(*item)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def flush(self) -> None:
+        """Block until every queued write has been performed."""
+        self._queue.join()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def read(self, name: str) -> bytes:
+        self.flush()
+        return self.backend.read(name)
+
+    def write(self, name: str, data: bytes) -> None:
+        if not self._thread.is_alive():
+            raise ValueError("Save backend is closed")
+        self._queue.put((name, bytes(data)))
+
+    def delete(self, name: str) -> None:
+        self.flush()
+        self.backend.delete(name)
+
+    def names(self) -> list[str]:
+        self.flush()
+        return self.backend.names()
+
+    def __contains__(self, name: str) -> bool:
+        self.flush()
+        return name in self.backend
+
+    def close(self) -> None:
+        """Finish queued writes and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.flush()
@@ -0,0 +1,358 @@
+"""Multi-session asyncio HTTP/JSON game server.
+
+Stdlib only. Each session is a ZorkWebAdapter keyed by a random id. VM turns
+run in a thread pool so a slow turn never blocks the event loop, and a
+per-session lock keeps one session's turns in order while other sessions
+run concurrently.
+
+Endpoints (request and response bodies are JSON):
+
+    POST   /sessions               -> {"session", "output"}   (output is the intro)
+    GET    /sessions/<id>/intro    -> {"output"}
+    POST   /sessions/<id>/execute  {"command"} -> {"output"}
+    GET    /sessions/<id>/save     -> {"data"}   (base64 binary snapshot)
+    POST   /sessions/<id>/load     {"data"} -> {}   (data as returned by save)
+    DELETE /sessions/<id>          -> {}
+    GET    /stats                  -> {"sessions", "latency": {endpoint: summary}}
+
+Every response also carries ``latency_ms``, the server-side handling time.
+Errors are ``{"error": message}``: 4xx for bad requests, 500 for a failure
+inside the server. With turn limits set, a turn that exceeds them closes its
+session and returns 503.
+
+    python -m yazm.server stories/minizork.z3 --port 8080
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import binascii
+import contextlib
+import json
+import secrets
+import struct
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from . import snapshot
+from .story import StoryImage, load_story
+from .web_adapter import TurnLimitExceeded, ZorkWebAdapter
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+_MAX_BODY = 1 << 20
+# per-session action -> HTTP method
+_ACTIONS = {"intro": "GET", "execute": "POST", "save": "GET", "load": "POST"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class LatencyStats:
+    """Request latencies for one endpoint; percentiles use the most recent ``window`` samples."""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def summary(self) -> dict[str, float]:
+        recent = sorted(self.recent)
+
+        def percentile(p: float) -> float:
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else 0.0
+
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": self.max * 1000,
+        }
+
+
+class Session:
+    def __init__(self, adapter: ZorkWebAdapter):
+        self.adapter = adapter
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+
+class GameServer:
+    """Sessions of one story, served over HTTP by serve() or driven directly with handle()."""
+
+    def __init__(
+        self,
+        story_data: bytes | StoryImage,
+        workers: int = 4,
+        adapter_factory: Callable[[StoryImage], ZorkWebAdapter] | None = None,
+        turn_instructions: int | None = None,
+        turn_timeout: float | None = None,
+    ):
+        self.story = story_data if isinstance(story_data, StoryImage) else load_story(bytes(story_data))
+        self.adapter_factory = adapter_factory or (
+            lambda story: ZorkWebAdapter(
+                story, snapshot_format="binary", turn_instructions=turn_instructions, turn_timeout=turn_timeout
+            )
+        )
+        self.sessions: dict[str, Session] = {}
+        self.latency: dict[str, LatencyStats] = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="yazm-vm")
+        self._server: asyncio.Server | None = None
+
+    async def _in_worker(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def _run_turn(self, session_id: str, func: Callable[..., str], *args: Any) -> str:
+        """Run a VM turn in the pool; a runaway turn closes its session."""
+        try:
+            return await self._in_worker(func, *args)
+        except TurnLimitExceeded as e:
+            self.sessions.pop(session_id, None)
+            raise HTTPError(503, f"{e}; session closed") from None
+
+    def _session(self, session_id: str) -> Session:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HTTPError(404, f"Unknown session: {session_id}")
+        session.last_used = time.monotonic()
+        return session
+
+    # --- Endpoints ---
+
+    async def create_session(self) -> dict[str, Any]:
+        adapter = self.adapter_factory(self.story)
+        session_id = secrets.token_hex(8)
+        session = Session(adapter)
+        self.sessions[session_id] = session
+        async with session.lock:
+            output = await self._run_turn(session_id, adapter.get_intro)
+        return {"session": session_id, "output": output}
+
+    async def intro(self, session_id: str) -> dict[str, Any]:
+        session = self._session(session_id)
+        async with session.lock:
+            return {"output": await self._run_turn(session_id, session.adapter.get_intro)}
+
+    async def execute(self, session_id: str, command: str) -> dict[str, Any]:
+        session = self._session(session_id)
+        async with session.lock:
+            return {"output": await self._run_turn(session_id, session.adapter.execute, command.split())}
+
+    async def save(self, session_id: str) -> dict[str, Any]:
+        session = self._session(session_id)
+        async with session.lock:
+            data = await self._in_worker(session.adapter.admin_save)
+        return {"data": base64.b64encode(data).decode("ascii")}
+
+    async def load(self, session_id: str, data: str) -> dict[str, Any]:
+        session = self._session(session_id)
+        try:
+            raw = base64.b64decode(data, validate=True)
+        except (binascii.Error, ValueError):
+            raise HTTPError(400, "Save data is not valid base64") from None
+        # only the binary format, which checks the story and holds dynamic memory alone, is taken from clients
+        if not snapshot.is_binary(raw):
+            raise HTTPError(400, "Save data is not a binary snapshot")
+        async with session.lock:
+            try:
+                await self._in_worker(session.adapter.admin_load, raw)
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+            except (KeyError, TypeError, IndexError, struct.error):
+                raise HTTPError(400, "Save data is not a valid snapshot") from None
+        return {}
+
+    async def delete_session(self, session_id: str) -> dict[str, Any]:
+        self._session(session_id)
+        del self.sessions[session_id]
+        return {}
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "latency": {name: stats.summary() for name, stats in sorted(self.latency.items())},
+        }
+
+    # --- Routing ---
+
+    def _resolve(self, method: str, path: str) -> tuple[str, str]:
+        """Map a request to (endpoint name, session id)."""
+        parts = [p for p in path.split("?")[0].split("/") if p]
+        if parts == ["stats"]:
+            allowed, endpoint, session_id = "GET", "stats", ""
+        elif parts == ["sessions"]:
+            allowed, endpoint, session_id = "POST", "create", ""
+        elif len(parts) == 2 and parts[0] == "sessions":
+            allowed, endpoint, session_id = "DELETE", "delete", parts[1]
+        elif len(parts) == 3 and parts[0] == "sessions" and parts[2] in _ACTIONS:
+            allowed, endpoint, session_id = _ACTIONS[parts[2]], parts[2], parts[1]
+        else:
+            raise HTTPError(404, f"No such endpoint: {path}")
+        if method != allowed:
+            raise HTTPError(405, f"{method} not allowed on {path}")
+        return endpoint, session_id
+
+    async def _dispatch(self, endpoint: str, session_id: str, body: dict[str, Any]) -> dict[str, Any]:
+        if endpoint == "stats":
+            return self.stats()
+        if endpoint == "create":
+            return await self.create_session()
+        if endpoint == "delete":
+            return await self.delete_session(session_id)
+        if endpoint == "intro":
+            return await self.intro(session_id)
+        if endpoint == "save":
+            return await self.save(session_id)
+        if endpoint == "execute":
+            command = body.get("command")
+            if not isinstance(command, str):
+                raise HTTPError(400, "Expected a string 'command'")
+            return await self.execute(session_id, command)
+        data = body.get("data")
+        if not isinstance(data, str):
+            raise HTTPError(400, "Expected a string 'data'")
+        return await self.load(session_id, data)
+
+    async def handle(self, method: str, path: str, body: dict[str, Any] | None = None) -> tuple[int, dict[str, Any]]:
+        """Handle one request and return (status, response body); used by the HTTP layer and tests."""
+        start = time.perf_counter()
+        endpoint = "unknown"
+        try:
+            endpoint, session_id = self._resolve(method.upper(), path)
+            result = await self._dispatch(endpoint, session_id, body or {})
+            status = 200
+        except HTTPError as e:
+            status, result = e.status, {"error": str(e)}
+        except Exception as e:
+            status, result = 500, {"error": str(e) or type(e).__name__}
+        elapsed = time.perf_counter() - start
+        self.latency.setdefault(endpoint, LatencyStats()).record(elapsed)
+        result["latency_ms"] = round(elapsed * 1000, 3)
+        return status, result
+
+    # --- HTTP ---
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple[str, str, dict[str, Any], bool] | None:
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, path, version = request_line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(400, "Malformed request line") from None
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length") from None
+        if not 0 <= length <= _MAX_BODY:
+            raise HTTPError(400, "Bad Content-Length")
+        body: dict[str, Any] = {}
+        if length:
+            try:
+                body = json.loads(await reader.readexactly(length))
+            except json.JSONDecodeError:
+                raise HTTPError(400, "Request body is not valid JSON") from None
+            if not isinstance(body, dict):
+                raise HTTPError(400, "Request body must be a JSON object")
+        return method, path, body, keep_alive
+
+    async def _serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            keep_alive = True
+            while keep_alive:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        break
+                    method, path, body, keep_alive = request
+                    status, result = await self.handle(method, path, body)
+                except HTTPError as e:
+                    status, result, keep_alive = e.status, {"error": str(e)}, False
+                except Exception as e:
+                    status, result, keep_alive = 500, {"error": str(e)}, False
+                payload = json.dumps(result).encode("utf-8")
+                writer.write(
+                    (
+                        f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                        "Content-Type: application/json\r\n"
+                        f"Content-Length: {len(payload)}\r\n"
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                    ).encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> asyncio.Server:
+        """Start listening; port 0 picks a free port (see ``address``)."""
+        self._server = await asyncio.start_server(self._serve_connection, host, port)
+        return self._server
+
+    @property
+    def address(self) -> tuple[str, int]:
+        assert self._server is not None
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._executor.shutdown(wait=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="yazm game server (HTTP/JSON)")
+    parser.add_argument("story_file", help="path to a Z-machine story file")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="threads running VM turns")
+    args = parser.parse_args()
+
+    with open(args.story_file, "rb") as f:
+        data = f.read()
+    server = GameServer(data, workers=args.workers)
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""LRU cache of live game sessions, hibernating idle ones to a save backend.
+
+A live session is a ZorkWebAdapter with its own memory and undo history.
+When the cache holds more than ``max_live`` sessions, or their estimated
+footprint exceeds ``max_bytes``, the least recently used session is frozen
+to a compact binary snapshot in ``backend`` and dropped from memory. The
+next call for that session thaws it again, transparently to the caller.
+
+Snapshots are written and read outside the cache lock, so a slow backend
+holds up only the session being moved. Each session also has a lock held
+from taking it out of the cache until its snapshot is written, and from
+reading the snapshot until the thawed session is back in the cache, so a
+session is never thawed from a snapshot older than its last turn.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+
+from .saves import SaveBackend
+from .story import StoryImage, load_story
+from .web_adapter import ZorkWebAdapter
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0  # calls that had to thaw a hibernated session
+    evictions: int = 0
+    thaws: int = 0
+    thaw_seconds: float = 0.0
+    max_thaw_seconds: float = 0.0
+
+    @property
+    def mean_thaw_ms(self) -> float:
+        return self.thaw_seconds / self.thaws * 1000 if self.thaws else 0.0
+
+
+@dataclass
+class _Entry:
+    adapter: ZorkWebAdapter
+    size: int
+    lock: threading.Lock = field(default_factory=threading.Lock)  # serializes turns of this session
+    pins: int = 0  # callers currently using the adapter; pinned sessions are never evicted
+
+
+class SessionCache:
+    """Sessions of one story with at most ``max_live`` (and ``max_bytes``) kept in memory."""
+
+    def __init__(
+        self,
+        story_data: bytes | StoryImage,
+        backend: SaveBackend,
+        max_live: int = 100,
+        max_bytes: int | None = None,
+        adapter_factory: Callable[[StoryImage], ZorkWebAdapter] | None = None,
+    ):
+        self.story = story_data if isinstance(story_data, StoryImage) else load_story(bytes(story_data))
+        self.backend = backend
+        self.max_live = max_live
+        self.max_bytes = max_bytes
+        self.adapter_factory = adapter_factory or (lambda story: ZorkWebAdapter(story, snapshot_format="binary"))
+        self.stats = CacheStats()
+        self._live: OrderedDict[str, _Entry] = OrderedDict()
+        self._live_bytes = 0
+        self._lock = threading.Lock()  # guards _live, _live_bytes, _session_locks and stats
+        # held while a session moves between _live and the backend; always taken before _lock
+        self._session_locks: dict[str, threading.Lock] = {}
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    @property
+    def live_bytes(self) -> int:
+        return self._live_bytes
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._live or session_id in self.backend
+
+    def create(self, session_id: str | None = None) -> tuple[str, str]:
+        """Start a new session; return (session id, intro text)."""
+        session_id = session_id or secrets.token_hex(8)
+        with self._session_lock(session_id):
+            if session_id in self:
+                raise ValueError(f"Session already exists: {session_id}")
+            adapter = self.adapter_factory(self.story)
+            intro = adapter.get_intro()
+            with self._lock:
+                self._insert(session_id, adapter)
+        self._evict()
+        return session_id, intro
+
+    @contextlib.contextmanager
+    def session(self, session_id: str) -> Iterator[ZorkWebAdapter]:
+        """Use a session's adapter exclusively, thawing it first if it was hibernated."""
+        entry = self._pin(session_id)
+        try:
+            with entry.lock:
+                yield entry.adapter
+        finally:
+            with self._lock:
+                entry.pins -= 1
+                new_size = entry.adapter.memory_usage
+                if self._live.get(session_id) is entry:
+                    self._live_bytes += new_size - entry.size
+                entry.size = new_size
+            self._evict()
+
+    def execute(self, session_id: str, command: str) -> str:
+        with self.session(session_id) as adapter:
+            return adapter.execute(command.split())
+
+    def delete(self, session_id: str):
+        with self._session_lock(session_id):
+            with self._lock:
+                entry = self._live.pop(session_id, None)
+                if entry is not None:
+                    self._live_bytes -= entry.size
+                self._session_locks.pop(session_id, None)
+            try:
+                self.backend.delete(session_id)
+            except KeyError:
+                if entry is None:
+                    raise KeyError(f"Unknown session: {session_id}") from None
+
+    def hibernate_all(self):
+        """Freeze every idle live session to the backend (e.g. before shutdown)."""
+        with self._lock:
+            victims = self._take_idle(everything=True)
+        self._hibernate(victims)
+
+    def _session_lock(self, session_id: str) -> threading.Lock:
+        with self._lock:
+            return self._session_locks.setdefault(session_id, threading.Lock())
+
+    def _pin_live(self, session_id: str) -> _Entry | None:
+        with self._lock:
+            entry = self._live.get(session_id)
+            if entry is not None:
+                self._live.move_to_end(session_id)
+                self.stats.hits += 1
+                entry.pins += 1
+            return entry
+
+    def _pin(self, session_id: str) -> _Entry:
+        entry = self._pin_live(session_id)
+        if entry is not None:
+            return entry
+        # thaw outside the cache lock so other sessions are not held up, but under the
+        # session's lock, so a hibernation of this session in flight finishes writing first
+        with self._session_lock(session_id):
+            entry = self._pin_live(session_id)  # another caller may have thawed it meanwhile
+            if entry is None:
+                try:
+                    data = self.backend.read(session_id)
+                except KeyError:
+                    with self._lock:
+                        self._session_locks.pop(session_id, None)
+                    raise KeyError(f"Unknown session: {session_id}") from None
+                start = time.perf_counter()
+                adapter = self.adapter_factory(self.story)
+                adapter.admin_load(data)
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.stats.misses += 1
+                    self.stats.thaws += 1
+                    self.stats.thaw_seconds += elapsed
+                    self.stats.max_thaw_seconds = max(self.stats.max_thaw_seconds, elapsed)
+                    entry = self._insert(session_id, adapter)
+                    entry.pins += 1
+        self._evict()
+        return entry
+
+    def _insert(self, session_id: str, adapter: ZorkWebAdapter) -> _Entry:
+        entry = _Entry(adapter, adapter.memory_usage)
+        self._live[session_id] = entry
+        self._live_bytes += entry.size
+        return entry
+
+    def _over_budget(self) -> bool:
+        return len(self._live) > self.max_live or (self.max_bytes is not None and self._live_bytes > self.max_bytes)
+
+    def _evict(self):
+        with self._lock:
+            victims = self._take_idle(everything=False)
+            self.stats.evictions += len(victims)
+        self._hibernate(victims)
+
+    def _take_idle(self, everything: bool) -> list[tuple[str, ZorkWebAdapter, threading.Lock]]:
+        """Remove idle sessions, least recently used first, until within budget (or all of them).
+
+        Called with the cache lock held. Each removed session's lock is
+        acquired and stays held until _hibernate() has written its snapshot.
+        """
+        victims = []
+        for session_id in [s for s, e in self._live.items() if not e.pins]:
+            if not everything and not self._over_budget():
+                break
+            lock = self._session_locks.setdefault(session_id, threading.Lock())
+            if not lock.acquire(blocking=False):  # being created or deleted; leave it to that caller
+                continue
+            entry = self._live.pop(session_id)
+            self._live_bytes -= entry.size
+            victims.append((session_id, entry.adapter, lock))
+        return victims
+
+    def _hibernate(self, victims: list[tuple[str, ZorkWebAdapter, threading.Lock]]):
+        """Write snapshots of sessions taken by _take_idle(), releasing each session's lock."""
+        with contextlib.ExitStack() as stack:
+            for _, _, lock in victims:
+                stack.callback(lock.release)
+            for session_id, adapter, _ in victims:
+                self.backend.write(session_id, adapter.admin_save())
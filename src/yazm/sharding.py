@@ -0,0 +1,223 @@
+"""Shard ZorkWebAdapter sessions across a pool of worker processes.
+
+The interpreter loop holds the GIL, so one process runs one turn at a time
+however many players are connected. ShardedSessions starts one process per
+worker, each owning the adapters of the sessions placed on it, and routes
+every call for a session to the worker holding it (sticky routing). New
+sessions go to the worker with the fewest sessions; rebalance() evens out
+the counts by moving sessions between workers as binary snapshots.
+
+Calls are synchronous and thread-safe. Each worker has its own pipe and lock,
+so threads (for example an asyncio server's executor) calling sessions on
+different workers run in parallel.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import secrets
+import threading
+import time
+from multiprocessing.connection import Connection
+from multiprocessing.context import BaseContext
+from typing import Any
+
+from .story import load_story
+from .web_adapter import ZorkWebAdapter
+
+
+def _worker_main(conn: Connection, story_data: bytes):
+    """Serve requests from the parent until told to stop."""
+    story = load_story(story_data)  # shared by this worker's sessions
+    adapters: dict[str, ZorkWebAdapter] = {}
+    turns = 0
+    busy = 0.0
+
+    def adapter_for(session_id: str) -> ZorkWebAdapter:
+        if session_id not in adapters:
+            raise KeyError(f"Unknown session: {session_id}")
+        return adapters[session_id]
+
+    while True:
+        op, *args = conn.recv()
+        if op == "stop":
+            conn.send(("ok", None))
+            return
+        start = time.perf_counter()
+        try:
+            if op == "create":
+                adapter = ZorkWebAdapter(story, snapshot_format="binary")
+                adapters[args[0]] = adapter
+                result: Any = adapter.get_intro()
+            elif op == "execute":
+                result = adapter_for(args[0]).execute(args[1])
+                turns += 1
+            elif op == "save":
+                result = adapter_for(args[0]).admin_save()
+            elif op == "load":
+                adapter_for(args[0]).admin_load(args[1])
+                result = None
+            elif op == "import":
+                adapter = ZorkWebAdapter(story, snapshot_format="binary")
+                adapter.admin_load(args[1])
+                adapters[args[0]] = adapter
+                result = None
+            elif op == "delete":
+                adapter_for(args[0])
+                del adapters[args[0]]
+                result = None
+            elif op == "stats":
+                result = {"sessions": len(adapters), "turns": turns, "busy_seconds": busy}
+            else:
+                raise ValueError(f"Unknown worker request: {op}")
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("key_error" if isinstance(e, KeyError) else "error", str(e.args[0] if e.args else e)))
+        busy += time.perf_counter() - start
+
+
+class _Worker:
+    def __init__(self, ctx: BaseContext, story_data: bytes, index: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, story_data), name=f"yazm-shard-{index}", daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.lock = threading.Lock()
+        self.sessions = 0
+
+    def call(self, op: str, *args: Any) -> Any:
+        with self.lock:
+            return self.call_locked(op, *args)
+
+    def call_locked(self, op: str, *args: Any) -> Any:
+        """Like call(), for a caller already holding ``lock``."""
+        self.conn.send((op, *args))
+        status, result = self.conn.recv()
+        if status == "key_error":
+            raise KeyError(result)
+        if status == "error":
+            raise ValueError(result)
+        return result
+
+
+class ShardedSessions:
+    """Sessions of one story spread over ``workers`` processes."""
+
+    def __init__(self, story_data: bytes, workers: int | None = None, mp_context: BaseContext | None = None):
+        ctx = mp_context or multiprocessing.get_context()
+        count = workers or multiprocessing.cpu_count()
+        self._workers = [_Worker(ctx, bytes(story_data), i) for i in range(count)]
+        self._placement: dict[str, int] = {}
+        self._lock = threading.Lock()  # guards placement and session counts
+        self.migrations = 0
+
+    def __enter__(self) -> ShardedSessions:
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _worker_for(self, session_id: str) -> _Worker:
+        with self._lock:
+            if session_id not in self._placement:
+                raise KeyError(f"Unknown session: {session_id}")
+            return self._workers[self._placement[session_id]]
+
+    def worker_of(self, session_id: str) -> int:
+        """Index of the worker currently holding ``session_id``."""
+        with self._lock:
+            if session_id not in self._placement:
+                raise KeyError(f"Unknown session: {session_id}")
+            return self._placement[session_id]
+
+    def create(self, session_id: str | None = None) -> tuple[str, str]:
+        """Start a session on the least-loaded worker; return (session id, intro text)."""
+        session_id = session_id or secrets.token_hex(8)
+        with self._lock:
+            if session_id in self._placement:
+                raise ValueError(f"Session already exists: {session_id}")
+            index = min(range(len(self._workers)), key=lambda i: self._workers[i].sessions)
+            self._placement[session_id] = index
+            self._workers[index].sessions += 1
+        try:
+            intro = self._workers[index].call("create", session_id)
+        except Exception:
+            self._forget(session_id)
+            raise
+        return session_id, intro
+
+    def _call(self, session_id: str, op: str, *args: Any) -> Any:
+        """Send a request to the worker holding a session, following it if it migrates meanwhile."""
+        while True:
+            worker = self._worker_for(session_id)
+            with worker.lock:
+                if self._worker_for(session_id) is worker:
+                    return worker.call_locked(op, session_id, *args)
+
+    def execute(self, session_id: str, command: str) -> str:
+        return self._call(session_id, "execute", command.split())
+
+    def save(self, session_id: str) -> bytes:
+        return self._call(session_id, "save")
+
+    def load(self, session_id: str, data: bytes):
+        self._call(session_id, "load", data)
+
+    def delete(self, session_id: str):
+        self._call(session_id, "delete")
+        self._forget(session_id)
+
+    def _forget(self, session_id: str):
+        with self._lock:
+            self._workers[self._placement.pop(session_id)].sessions -= 1
+
+    def migrate(self, session_id: str, target: int):
+        """Move a session to worker ``target`` as a binary snapshot."""
+        source = self.worker_of(session_id)
+        if source == target:
+            return
+        src, dst = self._workers[source], self._workers[target]
+        # lock both workers in index order so concurrent migrations cannot deadlock
+        first, second = sorted((src, dst), key=self._workers.index)
+        with first.lock, second.lock:
+            data = src.call_locked("save", session_id)
+            dst.call_locked("import", session_id, data)
+            src.call_locked("delete", session_id)
+            with self._lock:
+                self._placement[session_id] = target
+                src.sessions -= 1
+                dst.sessions += 1
+                self.migrations += 1
+
+    def rebalance(self) -> int:
+        """Move sessions until worker session counts differ by at most one; return the number moved."""
+        moved = 0
+        while True:
+            with self._lock:
+                counts = [w.sessions for w in self._workers]
+                busiest = counts.index(max(counts))
+                idlest = counts.index(min(counts))
+                if counts[busiest] - counts[idlest] <= 1:
+                    return moved
+                session_id = next(s for s, i in self._placement.items() if i == busiest)
+            self.migrate(session_id, idlest)
+            moved += 1
+
+    def load_report(self) -> list[dict[str, Any]]:
+        """Per-worker load: pid, sessions, turns served and seconds spent handling requests."""
+        report = []
+        for index, worker in enumerate(self._workers):
+            stats = worker.call("stats")
+            report.append({"worker": index, "pid": worker.process.pid, **stats})
+        return report
+
+    def close(self):
+        for worker in self._workers:
+            if worker.process.is_alive():
+                with contextlib.suppress(EOFError, OSError):
+                    worker.call("stop")
+            worker.process.join(timeout=5)
+            worker.conn.close()
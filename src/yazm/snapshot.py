@@ -1,12 +1,24 @@
-"""JSON + base64 full-state serialization for web server use."""
+"""Full-state serialization for web server use.
+
+Two formats are supported:
+
+- ``freeze``/``thaw``: JSON with all of memory base64-encoded.
+- ``freeze_binary``/``thaw_binary``: a versioned binary format holding only
+  the CMem diff of dynamic memory against the original story, Quetzal-style
+  packed frames and the RNG state as raw 32-bit words, optionally
+  zlib-compressed. Typically a few KB instead of ~175 KB for Lurking Horror.
+"""
 
 from __future__ import annotations
 
 import base64
 import json
-from typing import TYPE_CHECKING
+import struct
+import zlib
+from typing import TYPE_CHECKING, NamedTuple
 
 from .frame import Frame
+from .quetzal import _apply_cmem, _compress_cmem, pack_stks, parse_stks
 
 if TYPE_CHECKING:
     from .zmachine import ZMachine
@@ -24,12 +36,119 @@ def freeze(zm: ZMachine) -> str:
     )
 
 
+def load_dynamic(zm: ZMachine, json_str: str) -> bytes:
+    """Return the dynamic memory stored in a freeze() snapshot without applying it."""
+    memory = base64.b64decode(json.loads(json_str)["memory"])
+    return memory[0 : zm.header.static_memory_addr]
+
+
 def thaw(zm: ZMachine, json_str: str):
     """Restore ZMachine state from a JSON string produced by freeze()."""
     state = json.loads(json_str)
     memory = base64.b64decode(state["memory"])
-    zm.memory[0 : len(memory)] = memory
+    static = zm.story.static_memory_addr
+    # static and high memory are shared with the story (and its decode caches); only dynamic memory is state
+    if len(memory) != len(zm.story) or memory[static:] != zm.story.data[static:]:
+        raise ValueError("Snapshot is for a different story")
+    zm.memory.write_bulk(0, memory[0:static])
     zm.pc = state["pc"]
     zm.frames = [Frame.from_bytes(bytearray(f)) for f in state["frames"]]
     version, internalstate, gauss_next = state["rng_state"]
     zm.rng.setstate((version, tuple(internalstate), gauss_next))
+
+
+BINARY_MAGIC = b"YZSN"
+BINARY_VERSION = 1
+_FLAG_ZLIB = 0x01
+
+# magic, version, flags, release, serial, checksum
+_HEADER = struct.Struct(">4sBBH6sH")
+# pc, cmem length, stks length, rng version, has gauss_next, gauss_next
+_BODY = struct.Struct(">IIIBBd")
+_RNG_WORDS = struct.Struct(">625I")
+
+
+class CapturedState(NamedTuple):
+    """Machine state copied out of a ZMachine, ready to be packed elsewhere."""
+
+    dynamic: bytes
+    pc: int
+    stks: bytes
+    rng_state: tuple
+
+
+def capture(zm: ZMachine) -> CapturedState:
+    """Copy the state needed by pack(); cheap enough to run on the VM thread."""
+    return CapturedState(
+        dynamic=bytes(zm.memory[0 : zm.header.static_memory_addr]),
+        pc=zm.pc,
+        stks=pack_stks(zm.frames),
+        rng_state=zm.rng.getstate(),
+    )
+
+
+def pack(zm: ZMachine, state: CapturedState, compress: bool = True) -> bytes:
+    """Encode a captured state in the binary snapshot format."""
+    cmem = _compress_cmem(state.dynamic, zm.original_dynamic)
+    rng_version, words, gauss_next = state.rng_state
+    body = _BODY.pack(state.pc, len(cmem), len(state.stks), rng_version, gauss_next is not None, gauss_next or 0.0)
+    body += cmem + state.stks + _RNG_WORDS.pack(*words)
+    # the story's parsed header, not live memory: pack may run off the VM thread
+    header = zm.story.header
+    flags = 0
+    if compress:
+        body = zlib.compress(body)
+        flags |= _FLAG_ZLIB
+    return (
+        _HEADER.pack(BINARY_MAGIC, BINARY_VERSION, flags, header.release, bytes(header.serial_number), header.checksum)
+        + body
+    )
+
+
+def freeze_binary(zm: ZMachine, compress: bool = True) -> bytes:
+    """Serialize full ZMachine state to the compact binary snapshot format."""
+    return pack(zm, capture(zm), compress)
+
+
+def is_binary(data: bytes) -> bool:
+    return data[0:4] == BINARY_MAGIC
+
+
+def thaw_binary(zm: ZMachine, data: bytes):
+    """Restore ZMachine state from bytes produced by freeze_binary().
+
+    Raises ValueError on format errors or a snapshot from a different story.
+    """
+    if len(data) < _HEADER.size or not is_binary(data):
+        raise ValueError("Not a binary snapshot")
+    _, version, flags, release, serial, checksum = _HEADER.unpack_from(data)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported snapshot version: {version}")
+    header = zm.header
+    if (release, serial, checksum) != (header.release, bytes(header.serial_number), header.checksum):
+        raise ValueError("Snapshot is for a different story")
+
+    body = data[_HEADER.size :]
+    if flags & _FLAG_ZLIB:
+        try:
+            body = zlib.decompress(body)
+        except zlib.error as e:
+            raise ValueError(f"Corrupt snapshot: {e}") from None
+    if len(body) < _BODY.size:
+        raise ValueError("Snapshot truncated")
+    pc, cmem_len, stks_len, rng_version, has_gauss, gauss_next = _BODY.unpack_from(body)
+    pos = _BODY.size
+    cmem = body[pos : pos + cmem_len]
+    pos += cmem_len
+    stks = body[pos : pos + stks_len]
+    pos += stks_len
+    if len(body) != pos + _RNG_WORDS.size:
+        raise ValueError("Snapshot truncated")
+    words = _RNG_WORDS.unpack_from(body, pos)
+    frames = parse_stks(stks)
+
+    zm.memory.write_bulk(0, zm.original_dynamic)
+    _apply_cmem(cmem, zm.original_dynamic, zm.memory)
+    zm.pc = pc
+    zm.frames = frames
+    zm.rng.setstate((rng_version, words, gauss_next if has_gauss else None))
@@ -0,0 +1,138 @@
+"""Incrementally maintained fingerprint of machine state.
+
+The hash covers everything that decides how the machine runs from here:
+dynamic memory, pc, frames and RNG state. Dynamic memory is split into
+256-byte pages; each page contributes a 64-bit blake2b digest of its
+contents, salted with its number, and the page digests are XORed together.
+ZData's dirty-page tracking reports the pages written since the last hash,
+so only those are rehashed, and the RNG state is rehashed only after the RNG
+was used. The cost is therefore proportional to the pages a turn touched
+plus the frames, not to the size of memory. The result is the same in every
+process, so hashes can be compared across workers.
+
+Collisions: two different states hash alike with probability about 2**-64
+(one in ~1.8e19), so equal hashes may be treated as equal states for
+deduplication and memoization. Verification mode (``state_hash(verify=True)``
+or ``Options.verify_state_hash``) recomputes the hash from scratch and
+raises ValueError if the incremental value disagrees, which catches memory
+written without going through ZData's write methods.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import struct
+from random import Random
+from typing import TYPE_CHECKING
+
+from .quetzal import pack_stks
+from .snapshot import _RNG_WORDS
+from .zdata import PAGE_SHIFT, ZData
+
+if TYPE_CHECKING:
+    from .zmachine import ZMachine
+
+PAGE_SIZE = 1 << PAGE_SHIFT
+
+# pc, rng version
+_REGS = struct.Struct(">IB")
+# has gauss_next, gauss_next
+_GAUSS = struct.Struct(">?d")
+
+
+class TrackedRandom(Random):
+    """Random that counts the calls that change its state, so unchanged state need not be rehashed."""
+
+    changes = 0
+
+    def seed(self, a=None, version=2):
+        super().seed(a, version)
+        self.changes += 1
+
+    def setstate(self, state):
+        super().setstate(state)
+        self.changes += 1
+
+    def random(self) -> float:
+        self.changes += 1
+        return super().random()
+
+    def getrandbits(self, k: int) -> int:
+        self.changes += 1
+        return super().getrandbits(k)
+
+
+def _page_digest(memory: ZData, page: int, end: int) -> int:
+    start = page << PAGE_SHIFT
+    data = memoryview(memory)[start : min(start + PAGE_SIZE, end)]
+    # the page number goes in as the salt, so equal contents on different pages differ
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8, salt=page.to_bytes(16, "big")).digest(), "big")
+
+
+def _memory_digest(memory: ZData, end: int) -> int:
+    combined = 0
+    for page in range((end + PAGE_SIZE - 1) >> PAGE_SHIFT):
+        combined ^= _page_digest(memory, page, end)
+    return combined
+
+
+def _rng_digest(rng: Random) -> tuple[int, bytes]:
+    rng_version, words, gauss_next = rng.getstate()
+    h = hashlib.blake2b(_RNG_WORDS.pack(*words), digest_size=8)
+    h.update(_GAUSS.pack(gauss_next is not None, gauss_next or 0.0))
+    return rng_version, h.digest()
+
+
+def _combine(zm: ZMachine, memory_digest: int, rng: tuple[int, bytes]) -> int:
+    rng_version, rng_digest = rng
+    h = hashlib.blake2b(memory_digest.to_bytes(8, "big"), digest_size=8)
+    h.update(_REGS.pack(zm.pc, rng_version))
+    h.update(rng_digest)
+    h.update(pack_stks(zm.frames))
+    return int.from_bytes(h.digest(), "big")
+
+
+def full_hash(zm: ZMachine) -> int:
+    """The state hash computed from scratch, in time proportional to dynamic memory."""
+    return _combine(zm, _memory_digest(zm.memory, zm.story.static_memory_addr), _rng_digest(zm.rng))
+
+
+class StateHasher:
+    """Keeps the state hash of one machine up to date; see ZMachine.state_hash()."""
+
+    def __init__(self, zm: ZMachine):
+        self.memory = zm.memory
+        self.end = zm.story.static_memory_addr
+        self.pages = [
+            _page_digest(self.memory, page, self.end) for page in range((self.end + PAGE_SIZE - 1) >> PAGE_SHIFT)
+        ]
+        self.combined = 0
+        for digest in self.pages:
+            self.combined ^= digest
+        self.memory.start_page_tracking()
+        self._rng: Random | None = None
+        self._rng_changes = -1
+        self._rng_digest: tuple[int, bytes] = (0, b"")
+
+    def close(self):
+        self.memory.stop_page_tracking()
+
+    def memory_digest(self) -> int:
+        for page in self.memory.take_dirty_pages():
+            if page < len(self.pages):  # static memory is never written
+                digest = _page_digest(self.memory, page, self.end)
+                self.combined ^= self.pages[page] ^ digest
+                self.pages[page] = digest
+        return self.combined
+
+    def rng_digest(self, rng: Random) -> tuple[int, bytes]:
+        # a plain Random has no change count and is rehashed every time
+        changes = getattr(rng, "changes", None)
+        if rng is not self._rng or changes is None or changes != self._rng_changes:
+            self._rng = rng
+            self._rng_changes = -1 if changes is None else changes
+            self._rng_digest = _rng_digest(rng)
+        return self._rng_digest
+
+    def hash(self, zm: ZMachine) -> int:
+        return _combine(zm, self.memory_digest(), self.rng_digest(zm.rng))
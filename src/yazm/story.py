@@ -0,0 +1,59 @@
+"""Immutable story file data shared by every ZMachine session playing it."""
+
+from __future__ import annotations
+
+import functools
+from typing import TYPE_CHECKING
+
+from .zdata import ZData
+from .zheader import Header
+
+if TYPE_CHECKING:
+    from .objdiff import ObjectLayout
+    from .zinstruction import Instruction
+    from .zmachine import ZMachine
+
+
+class StoryImage:
+    """A story file, parsed once and shared between sessions.
+
+    Owns the original memory image, the parsed header, the original dynamic
+    memory that saves are diffed against, the dictionary and the decode
+    caches. Everything here is read-only once built; per-session state
+    (memory, frames, RNG, undo history) lives on ZMachine.
+
+    Instructions and strings are only cached at addresses at or above
+    static memory, which a story cannot modify, and are decoded from the
+    story's own bytes (by ``decoder``) rather than from a session's memory.
+    """
+
+    def __init__(self, raw_data: bytes | bytearray):
+        self.data = bytes(raw_data)
+        self.original_memory = ZData(self.data)
+        self.header = Header(self.original_memory)
+        self.static_memory_addr = self.header.static_memory_addr
+        self.original_dynamic = self.data[0 : self.static_memory_addr]
+        # filled in by the first ZMachine built from this image
+        self.dictionary: dict[str, int] | None = None
+        self.separators: list[int] = []
+        self.object_layout: ObjectLayout | None = None
+        self.instructions: dict[int, Instruction] = {}
+        self.strings: dict[int, str] = {}
+        # a machine that is never run, holding the story's own memory; fills the decode caches
+        self.decoder: ZMachine | None = None
+        # RNG seed -> (machine waiting at the first prompt, intro text); see ZorkWebAdapter.get_intro
+        self.intro_states: dict[tuple[int, ...], tuple[ZMachine, str]] = {}
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @functools.cached_property
+    def checksum(self) -> int:
+        """Sum of the bytes from 0x40 to the header's file length, mod 0x10000."""
+        return sum(memoryview(self.data)[0x40 : self.header.file_length]) % 0x1_0000
+
+
+@functools.lru_cache(maxsize=16)
+def load_story(raw_data: bytes) -> StoryImage:
+    """Return the shared StoryImage for a story file's bytes."""
+    return StoryImage(raw_data)
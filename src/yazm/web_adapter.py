@@ -7,46 +7,272 @@ Adventure engine.
 
 from __future__ import annotations
 
-import contextlib
+from collections.abc import Generator, Iterable
 
+from . import autosave, memo, snapshot
+from .autosave import Autosaver
+from .enums import RunStatus
+from .history import UndoHistory
+from .memo import ResponseCache
+from .objdiff import ObjectChange, diff_objects
+from .saves import FileSaveBackend, SaveBackend
+from .story import StoryImage, load_story
 from .zmachine import ZMachine
-from .zui_web import InputRequested, ZUIWeb
+from .zui_web import ZUIWeb
+
+
+class TurnLimitExceeded(Exception):
+    """Raised when a turn runs past turn_instructions or turn_timeout.
+
+    The machine is stopped between instructions; resume() continues the turn.
+    """
+
+    def __init__(self, status: RunStatus):
+        reason = "instruction budget exhausted" if status is RunStatus.BUDGET else "time limit exceeded"
+        super().__init__(f"Turn stopped: {reason}")
+        self.status = status
 
 
 class ZorkWebAdapter:
-    def __init__(self, story_data: bytes):
-        self._story_data = story_data
+    def __init__(
+        self,
+        story_data: bytes | StoryImage,
+        track_object_changes: bool = False,
+        snapshot_format: str = "json",
+        save_backend: SaveBackend | None = None,
+        save_name: str = "save",
+        autosaver: Autosaver | None = None,
+        undo_depth: int = 0,
+        turn_instructions: int | None = None,
+        turn_timeout: float | None = None,
+        response_cache: ResponseCache | None = None,
+    ):
+        if snapshot_format not in ("json", "binary"):
+            raise ValueError(f"Unknown snapshot format: {snapshot_format}")
+        # sessions for the same story file share one StoryImage
+        self._story = story_data if isinstance(story_data, StoryImage) else load_story(bytes(story_data))
+        self.snapshot_format = snapshot_format
         self._ui = ZUIWeb()
-        self._zm = ZMachine(story_data)
-        self._zm.ui = self._ui
+        # in-game save/restore is only enabled when a backend is supplied
+        self.save_backend = save_backend
+        if save_backend is not None:
+            self._ui.save_name = save_name
+        self.autosaver = autosaver
+        # commands that undo() can step back through; 0 disables the history.
+        # Kept apart from the machine's own undos, which serve the game's save_undo.
+        self.undo_depth = undo_depth
+        self._undos = UndoHistory(undo_depth)
+        self._redos = UndoHistory(undo_depth)
+        # per-turn limits; a turn that exceeds one raises TurnLimitExceeded
+        self.turn_instructions = turn_instructions
+        self.turn_timeout = turn_timeout
+        # opt-in memoization of responses, usually shared by all sessions of a story
+        self.response_cache = response_cache
+        self._zm = self._new_machine()
+        # the VM runs as a generator suspended in sread between commands
+        self._vm: Generator[RunStatus, str | None, RunStatus] | None = None
+        self._status: RunStatus | None = None
         self._intro_collected = False
+        self.track_object_changes = track_object_changes
+        self.last_object_changes: list[ObjectChange] = []
 
-    def _run_until_input(self):
-        """Run the Z-machine until it requests input or the game ends."""
-        with contextlib.suppress(InputRequested):
-            self._zm.run()
+    def _new_machine(self) -> ZMachine:
+        return self._configure(ZMachine(self._story))
 
-    def get_intro(self) -> str:
-        """Run from the start to the first zinput() and return the intro text."""
-        if not self._intro_collected:
-            self._run_until_input()
-            self._intro_collected = True
+    def _configure(self, zm: ZMachine) -> ZMachine:
+        zm.ui = self._ui
+        # always assigned: a machine cloned from a cached template must not keep another session's storage
+        zm.save_backend = self.save_backend if self.save_backend is not None else FileSaveBackend()
+        zm.autosaver = self.autosaver
+        return zm
+
+    def _advance(self, input_str: str | None = None):
+        """Run the VM generator until it waits for input or the game ends.
+
+        With ``input_str``, the machine must be waiting in a read; the text
+        is handed to that read.
+        """
+        if self._vm is None:
+            self._vm = self._zm.run_resumable(self.turn_instructions, self.turn_timeout)
+            self._status = None
+        try:
+            if input_str is None:
+                self._status = next(self._vm)
+            else:
+                self._status = self._vm.send(input_str)
+        except StopIteration:
+            self._status = RunStatus.HALTED
+        if self._status in (RunStatus.BUDGET, RunStatus.DEADLINE):
+            raise TurnLimitExceeded(self._status)
+
+    def _await_input(self):
+        """Bring the machine to a read waiting for input, unless the game has ended."""
+        while self._vm is None or self._status in (None, RunStatus.BUDGET, RunStatus.DEADLINE):
+            self._advance()
+
+    def _restarted(self):
+        """Machine state was replaced (undo, load, ...): resume from its pc with a new generator."""
+        if self._vm is not None:
+            self._vm.close()
+        self._vm = None
+        self._status = None
+
+    def resume(self) -> str:
+        """Continue a turn stopped by TurnLimitExceeded, with fresh limits; return its output."""
+        self._advance()
         return self._ui.get_output()
 
+    def get_intro(self) -> str:
+        """Run from the start to the first read and return the intro text.
+
+        The story runs deterministically for a given RNG seed, so the first
+        session of a story keeps a clone of the machine at its first prompt
+        and later sessions start from a copy of it instead of re-running the
+        startup code.
+        """
+        if self._intro_collected:
+            return self._ui.get_output()
+        key = tuple(self._zm.options.rand_seed)
+        cached = self._story.intro_states.get(key) if self._vm is None else None
+        if cached is not None:
+            template, intro = cached
+            self._zm = self._configure(template.clone())
+            self._await_input()  # enter the read (status line update) as a fresh run would
+            self._ui.get_output()
+        else:
+            self._await_input()
+            intro = self._ui.get_output()
+            if self._status is RunStatus.INPUT:
+                template = self._zm.clone()
+                template.ui = None
+                template.save_backend = FileSaveBackend()
+                template.autosaver = None
+                self._story.intro_states.setdefault(key, (template, intro))
+        self._intro_collected = True
+        return intro
+
     def execute(self, tokens: list[str]) -> str:
         """Run a command and return the game's text output."""
+        self._await_input()
+        if self._status is RunStatus.HALTED:
+            return self._ui.get_output()
+        if self.undo_depth:
+            # the machine is waiting in sread, so this is a clean undo point
+            self._zm.push_state(self._undos, self._zm.pc)
+            self._redos.clear()
         command = " ".join(tokens)
-        self._ui.set_input(command)
-        self._run_until_input()
+        if self._memoizable():
+            return self._execute_memoized(command)
+        if self.track_object_changes:
+            before = bytes(self._zm.memory[0 : self._zm.header.static_memory_addr])
+            self._advance(command)
+            self.last_object_changes = diff_objects(self._zm, before, self._zm.memory)
+        else:
+            self._advance(command)
         return self._ui.get_output()
 
+    def _memoizable(self) -> bool:
+        # saves, autosaves and object diffs need the turn to actually run
+        return (
+            self.response_cache is not None
+            and self.save_backend is None
+            and self.autosaver is None
+            and not self.track_object_changes
+        )
+
+    def _execute_memoized(self, command: str) -> str:
+        assert self.response_cache is not None
+        zm = self._zm
+        state_hash = zm.state_hash()
+        response = self.response_cache.get(state_hash, command)
+        if response is not None:
+            memo.apply(zm, response)
+            self._restarted()
+            self._await_input()  # enter the next read as the recorded turn did
+            self._ui.get_output()
+            return response.output
+        before = bytes(zm.memory[0 : zm.story.static_memory_addr])
+        state_loads = zm.state_loads
+        self._advance(command)
+        output = self._ui.get_output()
+        if self._status is RunStatus.INPUT and zm.state_loads == state_loads:
+            self.response_cache.put(state_hash, command, memo.record(zm, before, output))
+        return output
+
+    def execute_many(self, commands: Iterable[list[str]]) -> list[str]:
+        """Run several commands; return each command's output.
+
+        If the game ends partway, fewer outputs than commands are returned.
+        """
+        outputs = []
+        for tokens in commands:
+            self._await_input()
+            if self._status is RunStatus.HALTED:
+                break
+            outputs.append(self.execute(tokens))
+        return outputs
+
+    @property
+    def memory_usage(self) -> int:
+        """Approximate bytes held by this session: its memory plus undo/redo histories."""
+        zm = self._zm
+        histories = (zm.undos, zm.redos, self._undos, self._redos)
+        return len(zm.memory) + sum(history.memory_usage for history in histories)
+
+    def _step(self, source: UndoHistory, target: UndoHistory) -> bool:
+        if not source:
+            return False
+        self._zm.push_state(target, self._zm.pc)
+        self._zm.pop_state(source)
+        self._restarted()
+        return True
+
+    def undo(self) -> bool:
+        """Step back to before the last command; False if there is nothing to undo."""
+        return self._step(self._undos, self._redos)
+
+    def redo(self) -> bool:
+        """Re-apply the last undone command; False if there is nothing to redo."""
+        return self._step(self._redos, self._undos)
+
     def admin_save(self) -> bytes:
-        """Serialize the full Z-machine state to bytes."""
+        """Serialize the full Z-machine state to bytes in the configured snapshot format."""
+        if self.snapshot_format == "binary":
+            return self._zm.freeze_binary()
         return self._zm.freeze().encode("utf-8")
 
     def admin_load(self, input_bytes: bytes) -> None:
-        """Restore Z-machine state from bytes produced by admin_save."""
-        self._zm = ZMachine(self._story_data)
-        self._zm.ui = self._ui
-        self._zm.thaw(input_bytes.decode("utf-8"))
+        """Restore Z-machine state from bytes produced by admin_save (either format).
+
+        The undo/redo history starts empty again. If the data cannot be
+        loaded the current game is left untouched.
+        """
+        zm = self._new_machine()
+        if snapshot.is_binary(input_bytes):
+            zm.thaw_binary(input_bytes)
+        else:
+            zm.thaw(input_bytes.decode("utf-8"))
+        self._zm = zm
+        self._undos.clear()
+        self._redos.clear()
+        self._restarted()
+        self._intro_collected = True
+
+    def recover(self) -> bool:
+        """Restart from the autosaver's latest checkpoint; False if there is none.
+
+        Play resumes at the prompt for the command being entered when the
+        checkpoint was taken.
+        """
+        if self.autosaver is None:
+            raise ValueError("No autosaver configured")
+        self.autosaver.flush()
+        zm = self._new_machine()
+        if not autosave.recover(zm, self.autosaver.backend, self.autosaver.name):
+            return False
+        self._zm = zm
+        self._undos.clear()
+        self._redos.clear()
+        self._restarted()
         self._intro_collected = True
+        return True
@@ -1,8 +1,25 @@
 from __future__ import annotations
 
+import re
+from collections.abc import Callable
+
+# callback(addr, old, new): ints for u8/u16 writes, bytes for bulk writes
+WatchCallback = Callable[[int, int | bytes, int | bytes], None]
+Watch = tuple[int, int, WatchCallback]
+
+_NONZERO = re.compile(rb"[^\x00]")
+
+# dirty-page tracking granularity: 256-byte pages
+PAGE_SHIFT = 8
+
 
 class ZData(bytearray):
-    """ZData Class."""
+    """ZData Class.
+
+    Write watchpoints, the write journal and dirty-page tracking are
+    implemented by swapping the instance over to _HookedZData while any of
+    them is active, so the normal write path carries no extra checks.
+    """
 
     class ZDataWriter:
         def __init__(self, zd: ZData, addr: int):
@@ -61,3 +78,155 @@ class ZData(bytearray):
 
     def get_reader(self, addr: int) -> ZData.ZDataReader:
         return self.ZDataReader(self, addr)
+
+    def _update_hooks(self):
+        hooked = (
+            bool(self.__dict__.get("_watches"))
+            or self.__dict__.get("_journal") is not None
+            or self.__dict__.get("_dirty_pages") is not None
+        )
+        self.__class__ = _HookedZData if hooked else ZData
+
+    def add_watch(self, start: int, end: int, callback: WatchCallback) -> Watch:
+        """Call ``callback(addr, old, new)`` on every write touching [start, end)."""
+        watch = (start, end, callback)
+        self.__dict__.setdefault("_watches", []).append(watch)
+        self._update_hooks()
+        return watch
+
+    def remove_watch(self, watch: Watch):
+        watches = self.__dict__.get("_watches", [])
+        if watch in watches:
+            watches.remove(watch)
+        self._update_hooks()
+
+    @property
+    def watches(self) -> list[Watch]:
+        return list(self.__dict__.get("_watches", []))
+
+    # --- write journal ---
+
+    @property
+    def journaling(self) -> bool:
+        return self.__dict__.get("_journal") is not None
+
+    @property
+    def journal_epoch(self) -> int:
+        """Bumped whenever the journal is restarted or emptied, invalidating old positions."""
+        return self.__dict__.get("_journal_epoch", 0)
+
+    def start_journal(self):
+        """Record (addr, old_value) for every byte written from now on."""
+        self._journal = []
+        self._journal_epoch = self.journal_epoch + 1
+        self._update_hooks()
+
+    def stop_journal(self):
+        self._journal = None
+        self._update_hooks()
+
+    @property
+    def journal_position(self) -> int:
+        """Current length of the journal; pass it as ``since`` to look back to this point."""
+        return len(self.__dict__.get("_journal") or ())
+
+    def checkpoint(self) -> dict[int, int]:
+        """Empty the journal and return the changes it held."""
+        changes = self.journal_changes()
+        if self.journaling:
+            self._journal = []
+            self._journal_epoch = self.journal_epoch + 1
+        return changes
+
+    def journal_changes(self, since: int = 0) -> dict[int, int]:
+        """Map each address written after position ``since`` to its value at that point.
+
+        Addresses that were written but hold that value again are left out.
+        Cost is proportional to the number of writes, not the memory size.
+        """
+        journal = self.__dict__.get("_journal") or []
+        first: dict[int, int] = {}
+        for addr, old in journal[since:]:
+            first.setdefault(addr, old)
+        return {addr: old for addr, old in first.items() if self[addr] != old}
+
+    def rollback(self, since: int = 0):
+        """Undo every write made after journal position ``since``."""
+        if not self.journaling:
+            return
+        changes = self.journal_changes(since)
+        journal = self._journal[:since]
+        self._journal = None
+        for addr, old in changes.items():
+            self.write_u8(addr, old)
+        self._journal = journal
+
+    # --- dirty pages ---
+
+    @property
+    def tracking_pages(self) -> bool:
+        return self.__dict__.get("_dirty_pages") is not None
+
+    def start_page_tracking(self):
+        """Record the page (address >> PAGE_SHIFT) of every byte written from now on."""
+        self._dirty_pages = set()
+        self._update_hooks()
+
+    def stop_page_tracking(self):
+        self._dirty_pages = None
+        self._update_hooks()
+
+    def take_dirty_pages(self) -> set[int]:
+        """Return the pages written since the last call, or since tracking started, and start afresh.
+
+        A page may be reported even if it was written back to its old contents.
+        """
+        pages = self.__dict__.get("_dirty_pages")
+        if pages is None:
+            raise ValueError("Page tracking is not active")
+        self._dirty_pages = set()
+        return pages
+
+
+class _HookedZData(ZData):
+    """ZData with write watchpoints, the write journal and/or dirty-page tracking active."""
+
+    _journal: list[tuple[int, int]] | None = None
+    _dirty_pages: set[int] | None = None
+
+    def _notify(self, index: int, length: int, old: int | bytes, new: int | bytes):
+        for start, end, callback in list(self.__dict__.get("_watches", ())):
+            if index < end and index + length > start:
+                callback(index, old, new)
+
+    def write_u16(self, index: int, value: int):
+        old = self.u16(index)
+        if self._journal is not None:
+            self._journal.append((index, old >> 8))
+            self._journal.append((index + 1, old & 0xFF))
+        if self._dirty_pages is not None:
+            self._dirty_pages.add(index >> PAGE_SHIFT)
+            self._dirty_pages.add((index + 1) >> PAGE_SHIFT)
+        super().write_u16(index, value)
+        self._notify(index, 2, old, value & 0xFFFF)
+
+    def write_u8(self, index: int, value: int):
+        old = self[index]
+        if self._journal is not None:
+            self._journal.append((index, old))
+        if self._dirty_pages is not None:
+            self._dirty_pages.add(index >> PAGE_SHIFT)
+        super().write_u8(index, value)
+        self._notify(index, 1, old, value)
+
+    def write_bulk(self, offset: int, data: bytes | bytearray):
+        old = bytes(self[offset : offset + len(data)])
+        if self._journal is not None:
+            # only bytes that actually change are journaled
+            xor = int.from_bytes(old, "big") ^ int.from_bytes(data, "big")
+            diff = xor.to_bytes(len(data), "big")
+            self._journal.extend((offset + m.start(), old[m.start()]) for m in _NONZERO.finditer(diff))
+        if self._dirty_pages is not None and data:
+            self._dirty_pages.update(range(offset >> PAGE_SHIFT, ((offset + len(data) - 1) >> PAGE_SHIFT) + 1))
+        super().write_bulk(offset, data)
+        self._notify(offset, len(data), old, bytes(data))
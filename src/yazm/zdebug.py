@@ -24,6 +24,7 @@ class ZDebugger:
             "$props": (self.debug_object_properties, "list object properties"),
             "$header": (self.debug_header, "show header information"),
             "$history": (self.debug_history, "list saved states"),
+            "$changes": (self.debug_changes, "list memory changed since the last checkpoint"),
             "$have_attr": (self.debug_have_attributes, "list objects that have given attribute enabled"),
             "$undo": (self.debug_undo, ""),
             "$redo": (self.debug_redo, ""),
@@ -126,8 +127,18 @@ class ZDebugger:
         # TODO
 
     def debug_history(self, *args, **kwargs):
-        pass
-        # TODO
+        for label, history in (("Undo", self.zm.undos), ("Redo", self.zm.redos)):
+            self.zm.ui.zoutput(f"{label} history: {len(history)} entries, {history.memory_usage} bytes\n")
+            for i, entry in enumerate(reversed(history.entries()), start=1):
+                self.zm.ui.zoutput(f"  {i}: pc=0x{entry.pc:04x} {entry.size} bytes\n")
+
+    def debug_changes(self, *args, **kwargs):
+        changes = self.zm.changes_since_checkpoint()
+        if not changes:
+            self.zm.ui.zoutput("[No changes since checkpoint]\n")
+            return
+        for addr, (old, new) in sorted(changes.items()):
+            self.zm.ui.zoutput(f"  0x{addr:04x}: {old:02x} -> {new:02x}\n")
 
     def debug_routine(self, *args, **kwargs):
         pass
@@ -1,18 +1,35 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import copy
 import sys
+import time
+from collections.abc import Generator, Iterable
 from dataclasses import dataclass
 from random import Random
 
-from . import quetzal, snapshot, zscii
-from .enums import OperandType, StatusLineType
+from . import objdiff, quetzal, snapshot, statehash, zscii
+from .autosave import Autosaver
+from .enums import Opcode, OperandType, RunStatus, StatusLineType
 from .frame import Frame
+from .history import UndoHistory
+from .objdiff import ObjectChange, ObjectLayout
 from .options import Options
+from .saves import FileSaveBackend, SaveBackend
+from .statehash import StateHasher, TrackedRandom
+from .story import StoryImage
 from .zdata import ZData
 from .zdebug import ZDebugger
 from .zheader import Header
 from .zinstruction import Branch, Instruction
+from .zui_async import ZUIAsync
 from .zui_std import ZUIStd
+from .zui_web import InputRequested, ZUIWeb
+
+# instructions between deadline checks in run()
+_CLOCK_CHECK_INTERVAL = 1000
+_SREAD = int(Opcode.VAR_228)
 
 
 class ZObject:
@@ -48,12 +65,27 @@ class ZObjectProperty:
     next_: int = 0
 
 
+@dataclass
+class _Checkpoint:
+    mark: tuple[int, int]  # write journal (epoch, position)
+    pc: int
+    stks: bytes
+    rng_state: tuple
+    undos: UndoHistory
+    redos: UndoHistory
+    undo_mark: tuple[int, int] | None
+    started_journal: bool
+
+
 class ZMachine:
     """ZMachine Class"""
 
-    def __init__(self, raw_data: bytes):
-        self.memory = ZData(raw_data)
-        self.original_memory = ZData(raw_data)
+    def __init__(self, raw_data: bytes | StoryImage, options: Options | None = None):
+        # story data shared between sessions; each session copies only the memory it runs in
+        self.story = raw_data if isinstance(raw_data, StoryImage) else StoryImage(raw_data)
+        self.memory = ZData(self.story.data)
+        self.original_memory = self.story.original_memory
+        self.original_dynamic = self.story.original_dynamic
         self.initial_pc = self.header.pc
         self.pc = self.header.pc
         self.version = self.header.version
@@ -65,17 +97,36 @@ class ZMachine:
         self.current_state = None
         self.save_name = ""
         self.save_dir = ""
-        self.original_dynamic = bytearray(raw_data[0 : self.header.static_memory_addr])
-        self.options = Options.default()
-        self.undos = []
-        self.redos = []
+        # where op_save/op_restore keep their files; names come from the UI
+        self.save_backend: SaveBackend = FileSaveBackend()
+        self.autosaver: Autosaver | None = None
+        # bumped whenever state is loaded from a save or an undo history, i.e.
+        # from outside the machine; see memo.py
+        self.state_loads = 0
+        # read here: undo limits, RNG seed and journaling apply from construction
+        self.options = options if options is not None else Options.default()
+        self.undos = UndoHistory(self.options.undo_depth, self.options.undo_budget)
+        self.redos = UndoHistory(self.options.undo_depth, self.options.undo_budget)
         self.frames = [Frame(0, None, [], [])]  # initial/main frame
         self.separators = []
-        self.rng = Random()
+        self.rng: Random = TrackedRandom()
         self.rng.seed(self.options.rand_seed)
         self.dictionary = {}
         self.running = False
-        self.populate_dictionary()
+        # (journal epoch, position) matching the newest undo entry, when known
+        self._undo_mark: tuple[int, int] | None = None
+        self._checkpoint: _Checkpoint | None = None
+        # created by the first state_hash() call, which starts dirty-page tracking
+        self._hasher: StateHasher | None = None
+        if self.options.write_journal:
+            self.memory.start_journal()
+        if self.story.dictionary is None:
+            self.populate_dictionary()
+            self.story.dictionary = self.dictionary
+            self.story.separators = self.separators
+        else:
+            self.dictionary = self.story.dictionary
+            self.separators = self.story.separators
 
     @property
     def header(self) -> Header:
@@ -83,17 +134,14 @@ class ZMachine:
 
     def calculate_checksum(self):
         """calculates the checksum against the original file data"""
-        sum = 0
-        for i in range(0x40, self.header.file_length):
-            sum += self.original_memory.u8(i)
-        return sum % 0x1_0000
+        return self.story.checksum
 
     def get_object_addr(self, obj_id: int) -> int:
         """get the actual zmachine memory address for an object based on its id."""
         if obj_id:
-            return self.header.obj_table_addr + ((obj_id - 1) * self.obj_size)
+            return self.story.header.obj_table_addr + ((obj_id - 1) * self.obj_size)
         else:
-            return self.header.obj_table_addr
+            return self.story.header.obj_table_addr
 
     def get_object_prop_table_addr(self, obj_id: int) -> int:
         """get the zmachine memory address for an object's properties"""
@@ -112,7 +160,7 @@ class ZMachine:
         the last object in the object table:
         """
         obj_table_end = self.get_object_prop_table_addr(1)
-        return (obj_table_end - self.header.obj_table_addr) // self.obj_size
+        return (obj_table_end - self.story.header.obj_table_addr) // self.obj_size
 
     def remove_obj(self, obj_id: int):
         parent = self.get_parent(obj_id)
@@ -181,7 +229,7 @@ class ZMachine:
 
     def get_default_prop(self, property_number: int) -> int:
         word_index = property_number - 1
-        addr = self.header.obj_table_addr - (31 if self.version <= 3 else 63) * 2 + word_index * 2
+        addr = self.story.header.obj_table_addr - (31 if self.version <= 3 else 63) * 2 + word_index * 2
         return self.memory.u16(addr)
 
     def read_object_prop(self, addr: int) -> ZObjectProperty:
@@ -293,31 +341,176 @@ class ZMachine:
 
     def restore_state(self, data: bytes):
         quetzal.restore(self, data)
+        self.state_loads += 1
+
+    def _journal_mark(self) -> tuple[int, int] | None:
+        if not self.memory.journaling:
+            return None
+        return (self.memory.journal_epoch, self.memory.journal_position)
+
+    def _journal_changes(self, mark: tuple[int, int] | None) -> dict[int, int] | None:
+        """changes since a journal mark, or None if the mark is no longer valid"""
+        if mark is None or not self.memory.journaling:
+            return None
+        if mark[0] != self.memory.journal_epoch or mark[1] > self.memory.journal_position:
+            return None
+        return self.memory.journal_changes(mark[1])
+
+    def push_state(self, history: UndoHistory, pc: int):
+        """record the current dynamic memory and frames, resuming at pc"""
+        changes = None
+        if history is self.undos and self.undos:
+            changes = self._journal_changes(self._undo_mark)
+        history.push(self.memory[0 : self.story.static_memory_addr], pc, self.frames, changes)
+        if history is self.undos:
+            self._undo_mark = self._journal_mark()
+
+    def pop_state(self, history: UndoHistory):
+        """restore the newest state in history"""
+        memory, pc, frames = history.pop()
+        self.memory.write_bulk(0, memory)
+        self.pc = pc
+        self.frames = frames
+        self.state_loads += 1
+        if history is self.undos:
+            self._undo_mark = None
+
+    def save_undo(self, pc: int):
+        self.push_state(self.undos, pc)
+        self.redos.clear()
+        if self.memory.journaling and self._checkpoint is None:
+            # nothing older than the undo point is needed; keep the journal short
+            self.memory.checkpoint()
+            self._undo_mark = self._journal_mark()
+
+    def checkpoint(self):
+        """mark the current state for rollback(); memory writes are journaled from here on"""
+        started_journal = self._checkpoint.started_journal if self._checkpoint else False
+        if not self.memory.journaling:
+            self.memory.start_journal()
+            started_journal = True
+        elif self._checkpoint is None and self._undo_mark is None:
+            self.memory.checkpoint()  # nothing else needs the old entries
+        mark = self._journal_mark()
+        assert mark is not None
+        self._checkpoint = _Checkpoint(
+            mark=mark,
+            pc=self.pc,
+            stks=quetzal.pack_stks(self.frames),
+            rng_state=self.rng.getstate(),
+            undos=self.undos.copy(),
+            redos=self.redos.copy(),
+            undo_mark=self._undo_mark,
+            started_journal=started_journal,
+        )
+
+    def rollback(self):
+        """return to the state at the last checkpoint(), in time proportional to the writes since"""
+        cp = self._checkpoint
+        if cp is None:
+            raise ValueError("No checkpoint to roll back to")
+        if self._journal_changes(cp.mark) is None:
+            raise ValueError("Write journal was reset since the checkpoint")
+        self.memory.rollback(cp.mark[1])
+        self.pc = cp.pc
+        self.frames = quetzal.parse_stks(cp.stks)
+        self.rng.setstate(cp.rng_state)
+        self.undos = cp.undos.copy()
+        self.redos = cp.redos.copy()
+        self._undo_mark = cp.undo_mark
+
+    def release_checkpoint(self):
+        """forget the checkpoint; stops journaling if checkpoint() started it"""
+        if self._checkpoint is not None and self._checkpoint.started_journal:
+            self.memory.stop_journal()
+            self._undo_mark = None
+        self._checkpoint = None
+
+    def changes_since_checkpoint(self) -> dict[int, tuple[int, int]]:
+        """map each memory address changed since checkpoint() to (old, new)"""
+        changes = self._journal_changes(self._checkpoint.mark) if self._checkpoint else None
+        return {addr: (old, self.memory[addr]) for addr, old in (changes or {}).items()}
 
     def undo(self) -> bool:
         if not self.undos:
             return False
-        current = self.make_save_state(self.pc)
-        self.redos.append(current)
-        state = self.undos.pop()
-        self.restore_state(state)
+        self.push_state(self.redos, self.pc)
+        self.pop_state(self.undos)
         return True
 
     def redo(self) -> bool:
         if not self.redos:
             return False
-        current = self.make_save_state(self.pc)
-        self.undos.append(current)
-        state = self.redos.pop()
-        self.restore_state(state)
+        self.push_state(self.undos, self.pc)
+        self.pop_state(self.redos)
         return True
 
+    def clone(self) -> ZMachine:
+        """fork an independent machine from the current state
+
+        The story image, dictionary and decode caches are shared; memory is
+        copied in one bytearray copy, frames and the RNG are copied, and the
+        undo/redo histories share their immutable entries. Watches, the write
+        journal, the autosaver and any checkpoint stay with the parent. The UI
+        is shared, so assign a new one before running the clone alongside the
+        parent.
+        """
+        other = copy.copy(self)
+        other.memory = ZData(self.memory)
+        other.frames = [frame.copy() for frame in self.frames]
+        other.rng = TrackedRandom.__new__(TrackedRandom)  # skip seeding from the OS; setstate overwrites it
+        other.rng.setstate(self.rng.getstate())
+        other.options = copy.copy(self.options)
+        other.undos = self.undos.copy()
+        other.redos = self.redos.copy()
+        other.debugger = ZDebugger(other)
+        other.autosaver = None
+        other._undo_mark = None
+        other._checkpoint = None
+        other._hasher = None
+        return other
+
+    def state_hash(self, verify: bool = False) -> int:
+        """fingerprint of memory, pc, frames and RNG state, kept up to date incrementally; see statehash.py
+
+        With verify (or options.verify_state_hash) the value is checked
+        against a full rehash and ValueError is raised if they differ.
+        """
+        if self._hasher is None or self._hasher.memory is not self.memory:
+            if self._hasher is not None:
+                self._hasher.close()
+            self._hasher = StateHasher(self)
+        value = self._hasher.hash(self)
+        if (verify or self.options.verify_state_hash) and value != statehash.full_hash(self):
+            raise ValueError("Incremental state hash does not match the machine state")
+        return value
+
     def freeze(self) -> str:
         return snapshot.freeze(self)
 
     def thaw(self, json_str: str):
         snapshot.thaw(self, json_str)
 
+    def freeze_binary(self, compress: bool = True) -> bytes:
+        return snapshot.freeze_binary(self, compress)
+
+    def thaw_binary(self, data: bytes):
+        snapshot.thaw_binary(self, data)
+
+    @property
+    def object_layout(self) -> ObjectLayout:
+        if self.story.object_layout is None:
+            self.story.object_layout = ObjectLayout(self)
+        return self.story.object_layout
+
+    def diff_objects(self, other: bytes | str) -> list[ObjectChange]:
+        """diff object state between a Quetzal save or freeze() snapshot and live memory"""
+        if isinstance(other, str):
+            before = snapshot.load_dynamic(self, other)
+        else:
+            before = quetzal.load_dynamic(self, other)
+        return objdiff.diff_objects(self, before, self.memory)
+
     def get_arguments(self, operands, optypes: list[OperandType]) -> list:
         arguments = []
         for i, op in enumerate(operands):
@@ -353,8 +546,20 @@ class ZMachine:
         else:
             self.pc = instr.next_
 
+    def _decoder(self) -> ZMachine:
+        """The story's decoding machine; the shared caches are filled from its memory, not this session's"""
+        decoder = self.story.decoder
+        if decoder is None:
+            decoder = self.story.decoder = ZMachine(self.story)
+        return decoder
+
     def decode_instruction(self, addr: int) -> Instruction:
-        return Instruction.decode(self, addr)
+        if addr < self.story.static_memory_addr:
+            return Instruction.decode(self, addr)
+        instr = self.story.instructions.get(addr)
+        if instr is None:
+            instr = self.story.instructions[addr] = Instruction.decode(self._decoder(), addr)
+        return instr
 
     def handle_instruction(self, instr: Instruction):
         from .ops import dispatch
@@ -365,11 +570,146 @@ class ZMachine:
     def is_debug_command(self, input_: str) -> bool:
         return self.debugger.is_debug_command(input_)
 
-    def run(self):
+    def run(self, max_instructions: int | None = None, deadline: float | None = None) -> RunStatus:
+        """run until the game quits, or until a limit is reached
+
+        max_instructions caps the instructions executed by this call, and
+        deadline is a time.monotonic() value, checked every
+        _CLOCK_CHECK_INTERVAL instructions. Limits stop the machine between
+        instructions, so calling run() again resumes exactly where it stopped.
+        """
+        self.running = True
+        if max_instructions is None and deadline is None:
+            while self.running:
+                instr = self.decode_instruction(self.pc)
+                self.handle_instruction(instr)
+            return RunStatus.HALTED
+
+        budget = max_instructions
+        while self.running:
+            if budget is not None and budget <= 0:
+                return RunStatus.BUDGET
+            if deadline is not None and time.monotonic() >= deadline:
+                return RunStatus.DEADLINE
+            count = _CLOCK_CHECK_INTERVAL if budget is None else min(budget, _CLOCK_CHECK_INTERVAL)
+            if budget is not None:
+                budget -= count
+            for _ in range(count):
+                instr = self.decode_instruction(self.pc)
+                self.handle_instruction(instr)
+                if not self.running:
+                    break
+        return RunStatus.HALTED
+
+    def run_resumable(
+        self, max_instructions: int | None = None, timeslice: float | None = None
+    ) -> Generator[RunStatus, str | None, RunStatus]:
+        """run as a generator that suspends instead of calling ui.zinput()
+
+        Yields RunStatus.INPUT when a read needs input; send() the text to
+        resume inside that same read, without re-decoding or re-running it.
+        With limits, also yields RunStatus.BUDGET after max_instructions and
+        RunStatus.DEADLINE after timeslice seconds; next() gives a fresh slice.
+        Returns RunStatus.HALTED when the game quits.
+        """
+        from .ops import sread_complete, sread_prepare
+
         self.running = True
+        if max_instructions is None and timeslice is None:
+            decode, handle = self.decode_instruction, self.handle_instruction
+            while self.running:
+                instr = decode(self.pc)
+                if instr.opcode == _SREAD:
+                    args = self.get_arguments(instr.operands, instr.optypes)
+                    sread_prepare(self, instr, args)
+                    input_str = yield RunStatus.INPUT
+                    sread_complete(self, instr, args, input_str or "")
+                else:
+                    handle(instr)
+            return RunStatus.HALTED
+
+        budget = deadline = None
+        since_clock = 0
         while self.running:
+            if budget is None and deadline is None:
+                # start of a slice
+                budget = max_instructions
+                deadline = time.monotonic() + timeslice if timeslice is not None else None
+                since_clock = 0
             instr = self.decode_instruction(self.pc)
+            if instr.opcode == _SREAD:
+                args = self.get_arguments(instr.operands, instr.optypes)
+                sread_prepare(self, instr, args)
+                input_str = yield RunStatus.INPUT
+                sread_complete(self, instr, args, input_str or "")
+                budget = deadline = None
+                continue
             self.handle_instruction(instr)
+            if budget is not None:
+                budget -= 1
+                if budget <= 0:
+                    budget = deadline = None
+                    yield RunStatus.BUDGET
+                    continue
+            if deadline is not None:
+                since_clock += 1
+                if since_clock >= _CLOCK_CHECK_INTERVAL:
+                    since_clock = 0
+                    if time.monotonic() >= deadline:
+                        budget = deadline = None
+                        yield RunStatus.DEADLINE
+        return RunStatus.HALTED
+
+    async def run_async(self, slice_instructions: int = 1000) -> RunStatus:
+        """run on an asyncio event loop until the game quits
+
+        Reads await ``ui.zinput()`` (see ZUIAsync), and control returns to the
+        loop every slice_instructions instructions, so many sessions can share
+        one loop without threads. Cancelling the task leaves the machine in a
+        read; calling run_async() again resumes there, and ZUIAsync does not
+        publish that read's output a second time.
+        """
+        vm = self.run_resumable(max_instructions=slice_instructions)
+        try:
+            status = next(vm)
+            while True:
+                if status is RunStatus.INPUT:
+                    status = vm.send(await self.ui.zinput())
+                else:
+                    await asyncio.sleep(0)
+                    status = next(vm)
+        except StopIteration as stop:
+            status = stop.value
+        finally:
+            vm.close()
+        if isinstance(self.ui, ZUIAsync):
+            self.ui.finish()
+        return status
+
+    def run_commands(self, commands: Iterable[str]) -> list[str]:
+        """run headless, feeding commands to successive reads in one continuous run
+
+        Returns the output of each command, up to the next prompt. Output from
+        before the first command (e.g. the intro) is prepended to the first.
+        If the game ends early, the remaining commands are dropped and fewer
+        outputs are returned. Uses the current UI if it is a ZUIWeb, otherwise
+        a temporary one.
+        """
+        ui = self.ui if isinstance(self.ui, ZUIWeb) else ZUIWeb()
+        previous_ui, self.ui = self.ui, ui
+        ui.queue_inputs(commands)
+        try:
+            with contextlib.suppress(InputRequested):
+                self.run()
+        finally:
+            ui.discard_inputs()
+            self.ui = previous_ui
+        leading, *outputs = ui.get_segments()
+        if outputs:
+            outputs[0] = leading + outputs[0]
+        else:
+            ui.zoutput(leading)  # no command ran; leave the output where it was
+        return outputs
 
     def handle_input(self, input_: str):
         # TODO: if self.paused_instr...
@@ -461,8 +801,13 @@ class ZMachine:
 
     def read_zstring(self, addr: int) -> str:
         """get a zstring from a memory address"""
-        packed_str = self.read_packed_string(addr)
-        return zscii.unpack_string(self, packed_str)
+        if addr < self.story.static_memory_addr:
+            return zscii.unpack_string(self, self.read_packed_string(addr))
+        text = self.story.strings.get(addr)
+        if text is None:
+            decoder = self._decoder()
+            text = self.story.strings[addr] = zscii.unpack_string(decoder, decoder.read_packed_string(addr))
+        return text
 
     def unpack(self, addr: int) -> int:
         if self.version in [1, 2, 3]:
@@ -487,13 +832,13 @@ class ZMachine:
     def read_global(self, index: int) -> int:
         if index > 240:
             raise Exception(f"can't read global {index}")
-        addr = self.header.global_variable_addr + index * 2
+        addr = self.story.header.global_variable_addr + index * 2
         return self.memory.u16(addr)
 
     def write_global(self, index: int, value: int):
         if index > 240:
             raise Exception(f"can't write global {index}")
-        addr = self.header.global_variable_addr + index * 2
+        addr = self.story.header.global_variable_addr + index * 2
         self.memory.write_u16(addr, value)
 
     def read_local(self, index: int) -> int:
@@ -554,7 +899,7 @@ class ZMachine:
         if index > 96:
             raise Exception(f"Bad Abbrev Index: {index}")
         offset = 2 * index
-        word_addr = self.memory.u16(self.header.abbrev_addr + offset)
+        word_addr = self.memory.u16(self.story.header.abbrev_addr + offset)
         addr = word_addr * 2
         return self.read_zstring(addr)
 
@@ -579,7 +924,8 @@ class ZMachine:
 
         for n in range(0, entry_count):
             addr_ = addr + n * entry_length
-            entry = self.read_zstring(addr_)
+            # decoded directly: building the story's decoder machine runs this too
+            entry = zscii.unpack_string(self, self.read_packed_string(addr_))
             self.dictionary[entry] = addr_
 
     def check_dictionary(self, word: str) -> int:
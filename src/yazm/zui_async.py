@@ -0,0 +1,90 @@
+"""Asyncio UI driver for ZMachine.run_async().
+
+zinput() is a coroutine: it hands the output produced since the last read
+to ``output()`` and then awaits the next input from ``send_input()``, so a
+session waiting for its player costs nothing on the event loop.
+
+    ui = ZUIAsync()
+    zm.ui = ui
+    task = asyncio.create_task(zm.run_async())
+    intro = await ui.output()
+    reply = await ui.command("open mailbox")
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+
+class ZUIAsync:
+    def __init__(self):
+        self._output_buffer: list[str] = []
+        self._inputs: asyncio.Queue[str] = asyncio.Queue()
+        # output chunks, one per read; None once the game has ended
+        self._outputs: asyncio.Queue[str | None] = asyncio.Queue()
+        self._status_left: str = ""
+        self._status_right: str = ""
+        self.finished = False
+        # the current read already published its output chunk; a read re-entered after
+        # a cancelled run_async() must not publish another
+        self._published = False
+
+    def send_input(self, text: str):
+        """Queue input for the next read."""
+        self._inputs.put_nowait(text)
+
+    async def output(self) -> str | None:
+        """Wait for the output up to the next read; None if the game has ended."""
+        if self.finished and self._outputs.empty():
+            return None
+        return await self._outputs.get()
+
+    async def command(self, text: str) -> str | None:
+        """Send one input and return the game's response."""
+        self.send_input(text)
+        return await self.output()
+
+    def get_status(self) -> tuple[str, str]:
+        return (self._status_left, self._status_right)
+
+    def finish(self):
+        """Called by run_async() when the game ends: flush output and wake waiting readers."""
+        if self._output_buffer:
+            self._outputs.put_nowait("".join(self._output_buffer))
+            self._output_buffer.clear()
+        self.finished = True
+        self._outputs.put_nowait(None)
+
+    # --- UI methods (ZUIStd interface, with an awaitable zinput) ---
+
+    def init(self):
+        pass
+
+    def zoutput(self, text: str):
+        self._output_buffer.append(text)
+
+    def zoutput_object(self, text: str, _highlight: bool = False, is_location: bool = False):
+        css_class = "location" if is_location else "object"
+        self._output_buffer.append(f'<span class="{css_class}">{text}</span>')
+
+    async def zinput(self) -> str:
+        if not self._published:
+            self._outputs.put_nowait("".join(self._output_buffer))
+            self._output_buffer.clear()
+            self._published = True
+        text = await self._inputs.get()
+        self._published = False
+        return text
+
+    def zinput_filename(self, prompt: str) -> str:
+        return ""
+
+    def set_status_bar(self, left: str, right: str):
+        self._status_left = left
+        self._status_right = right
+
+    def clear(self):
+        pass
+
+    def reset(self):
+        pass
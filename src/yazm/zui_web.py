@@ -7,6 +7,9 @@ cycle for web backends.
 
 from __future__ import annotations
 
+from collections import deque
+from collections.abc import Iterable
+
 
 class InputRequested(Exception):
     """Raised by zinput() to break out of zm.run() when input is needed."""
@@ -18,11 +21,37 @@ class ZUIWeb:
         self._pending_input: str | None = None
         self._status_left: str = ""
         self._status_right: str = ""
+        # answer to the game's save/restore filename prompt; "" cancels
+        self.save_name: str = ""
+        # batch mode: inputs for successive zinput() calls, and the output
+        # produced before each of them was consumed
+        self._input_queue: deque[str] = deque()
+        self._segments: list[str] = []
 
     def set_input(self, text: str):
         """Queue input text to be returned by the next zinput() call."""
         self._pending_input = text
 
+    def queue_inputs(self, inputs: Iterable[str]):
+        """Queue inputs for successive zinput() calls, after any set_input() text."""
+        self._input_queue.extend(inputs)
+
+    def discard_inputs(self) -> int:
+        """Drop queued inputs that were not consumed; return how many there were."""
+        count = len(self._input_queue)
+        self._input_queue.clear()
+        return count
+
+    def get_segments(self) -> list[str]:
+        """Return and clear buffered output, split where each queued input was consumed.
+
+        The first segment is the output from before the first queued input.
+        """
+        segments = self._segments
+        segments.append(self.get_output())
+        self._segments = []
+        return segments
+
     def get_output(self) -> str:
         """Return and clear all buffered output."""
         result = "".join(self._output_buffer)
@@ -50,10 +79,13 @@ class ZUIWeb:
             result = self._pending_input
             self._pending_input = None
             return result
+        if self._input_queue:
+            self._segments.append(self.get_output())
+            return self._input_queue.popleft()
         raise InputRequested()
 
     def zinput_filename(self, prompt: str) -> str:
-        return ""
+        return self.save_name
 
     def set_status_bar(self, left: str, right: str):
         self._status_left = left
@@ -0,0 +1,77 @@
+"""Tests for autosave.py (background autosave checkpoints)."""
+
+import pytest
+
+from yazm.autosave import Autosaver, recover
+from yazm.saves import MemorySaveBackend
+from yazm.web_adapter import ZorkWebAdapter
+from yazm.zmachine import ZMachine
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+def make_adapter(saver):
+    a = ZorkWebAdapter(ZSAMPLE_DATA, autosaver=saver)
+    a.get_intro()
+    return a
+
+
+def test_checkpoint_every_n_turns():
+    saver = Autosaver(MemorySaveBackend(), every_turns=2)
+    a = make_adapter(saver)
+    a.execute(["open", "mailbox"])
+    saver.flush()
+    assert saver.checkpoints == 0
+    a.execute(["take", "leaflet"])
+    saver.flush()
+    assert saver.checkpoints == 1
+    saver.close()
+
+
+def test_checkpoint_every_t_seconds():
+    now = [0.0]
+    saver = Autosaver(MemorySaveBackend(), every_turns=None, every_seconds=30, clock=lambda: now[0])
+    a = make_adapter(saver)
+    a.execute(["look"])
+    saver.flush()
+    assert saver.checkpoints == 0
+    now[0] = 31.0
+    a.execute(["look"])
+    saver.flush()
+    assert saver.checkpoints == 1
+    saver.close()
+
+
+def test_recover_resumes_at_prompt():
+    backend = MemorySaveBackend()
+    saver = Autosaver(backend, every_turns=1)
+    a = make_adapter(saver)
+    a.execute(["open", "mailbox"])
+    a.execute(["take", "leaflet"])  # checkpoint is taken before this command runs
+    saver.flush()
+
+    crashed = make_adapter(saver)
+    assert crashed.recover() is True
+    assert "leaflet" in crashed.execute(["look", "in", "mailbox"])
+    saver.close()
+
+
+def test_recover_without_checkpoint():
+    assert recover(ZMachine(ZSAMPLE_DATA), MemorySaveBackend()) is False
+
+
+def test_write_errors_surface_on_flush():
+    class Failing(MemorySaveBackend):
+        def write(self, name, data):
+            raise OSError("full")
+
+    saver = Autosaver(Failing(), every_turns=1)
+    make_adapter(saver).execute(["look"])
+    with pytest.raises(OSError, match="full"):
+        saver.flush()
+    saver.close()
+
+
+def test_needs_a_trigger():
+    with pytest.raises(ValueError, match="every_turns or every_seconds"):
+        Autosaver(MemorySaveBackend(), every_turns=None)
@@ -0,0 +1,73 @@
+"""Tests for explore.py (breadth-first state exploration)."""
+
+import io
+
+from yazm.enums import RunStatus
+from yazm.explore import Explorer, Frontier, dictionary_commands
+from yazm.web_adapter import ZorkWebAdapter
+from yazm.zmachine import ZMachine
+
+from ._sample_data import ZSAMPLE_DATA
+
+COMMANDS = ["north", "south", "open mailbox", "look"]
+
+
+def test_dictionary_commands():
+    zm = ZMachine(ZSAMPLE_DATA)
+    commands = dictionary_commands(zm)
+    assert {"north", "n", "open", "take"} <= set(commands)
+    assert "mailbo" not in commands
+    assert not [c for c in commands if not c[0].isalpha()]
+    assert "open mailbo" in dictionary_commands(zm, pairs=True)
+
+
+def test_frontier_is_fifo_through_the_file():
+    with Frontier() as frontier:
+        frontier.append(b"first", 1, 0)
+        frontier.append(b"second snapshot", 2, 1)
+        assert len(frontier) == 2
+        assert frontier.popleft() == (b"first", 1, 0)
+        frontier.append(b"third", 3, 1)
+        assert frontier.popleft() == (b"second snapshot", 2, 1)
+        assert frontier.popleft() == (b"third", 3, 1)
+        assert not frontier
+        frontier.append(b"again", 4, 2)  # the emptied file is reused from the start
+        assert frontier.popleft() == (b"again", 4, 2)
+
+
+def test_expand_matches_playing():
+    explorer = Explorer(ZSAMPLE_DATA, commands=COMMANDS)
+    transitions = explorer.expand(explorer.start)
+    assert [t.command for t in transitions] == COMMANDS
+    adapter = ZorkWebAdapter(ZSAMPLE_DATA)
+    adapter.get_intro()
+    assert transitions[2].output == adapter.execute(["open", "mailbox"])
+    assert transitions[2].state_hash == adapter._zm.state_hash()
+    # rolled back between commands, so expanding again gives the same results
+    assert explorer.expand(explorer.start) == transitions
+
+
+def test_run_writes_graph():
+    graph = io.StringIO()
+    explorer = Explorer(ZSAMPLE_DATA, commands=COMMANDS)
+    stats = explorer.run(max_depth=2, graph=graph)
+    lines = graph.getvalue().splitlines()
+    assert len(lines) == stats.transitions == len(COMMANDS) * stats.expanded
+    children = {line.split("\t")[2] for line in lines}
+    assert stats.states == len(children | {lines[0].split("\t")[0]})
+    assert stats.depth == 2
+    assert stats.states_per_second > 0
+
+
+def test_max_states():
+    stats = Explorer(ZSAMPLE_DATA, commands=COMMANDS).run(max_states=3)
+    assert stats.states == 3
+    assert stats.expanded == 1
+
+
+def test_game_end_and_budget():
+    stats = Explorer(ZSAMPLE_DATA, commands=["quit", "y"]).run(max_depth=2)
+    assert stats.halted == 1  # "quit" then "y"
+    explorer = Explorer(ZSAMPLE_DATA, commands=COMMANDS, max_instructions=10)
+    assert {t.status for t in explorer.expand(explorer.start)} == {RunStatus.BUDGET}
+    assert explorer.run().states == 1
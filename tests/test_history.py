@@ -0,0 +1,102 @@
+"""Tests for history.py (bounded, delta-encoded undo history)."""
+
+import pytest
+
+from yazm.frame import Frame
+from yazm.history import UndoHistory
+
+
+def make_frames(*stack):
+    frame = Frame(0, None, [], [])
+    frame.stack = list(stack)
+    return [frame]
+
+
+def make_memory(changes=None, size=1024):
+    memory = bytearray(size)
+    for addr, value in (changes or {}).items():
+        memory[addr] = value
+    return memory
+
+
+def test_empty_history():
+    history = UndoHistory()
+    assert len(history) == 0
+    assert not history
+    assert history.memory_usage == 0
+    with pytest.raises(IndexError):
+        history.pop()
+
+
+def test_push_pop_roundtrip():
+    history = UndoHistory()
+    states = [make_memory({10: 1}), make_memory({10: 2, 500: 7}), make_memory({10: 3})]
+    for pc, memory in enumerate(states):
+        history.push(memory, 0x100 + pc, make_frames(pc))
+    assert len(history) == 3
+    for pc in reversed(range(3)):
+        memory, restored_pc, frames = history.pop()
+        assert memory == bytes(states[pc])
+        assert restored_pc == 0x100 + pc
+        assert frames[0].stack == [pc]
+    assert len(history) == 0
+    assert history.memory_usage == 0
+
+
+def test_older_entries_are_deltas():
+    history = UndoHistory()
+    history.push(make_memory({1: 1}), 0, make_frames())
+    history.push(make_memory({1: 2}), 0, make_frames())
+    oldest, newest = history.entries()
+    assert newest.size >= 1024
+    assert oldest.size < 32
+    assert history.memory_usage == oldest.size + newest.size
+
+
+def test_push_copies_memory():
+    history = UndoHistory()
+    memory = make_memory({3: 3})
+    history.push(memory, 0, make_frames())
+    memory[3] = 9
+    assert history.pop()[0][3] == 3
+
+
+def test_max_depth_evicts_oldest():
+    history = UndoHistory(max_depth=2)
+    for pc in range(5):
+        history.push(make_memory({0: pc}), pc, make_frames())
+    assert [e.pc for e in history.entries()] == [3, 4]
+    assert history.pop()[1] == 4
+    assert history.pop()[0][0] == 3
+
+
+def test_byte_budget_evicts_oldest():
+    history = UndoHistory(max_bytes=1100)
+    for pc in range(10):
+        memory = bytearray(1024)
+        memory[pc * 50 : pc * 50 + 40] = bytes(range(1, 41))
+        history.push(memory, pc, make_frames())
+    assert history.memory_usage <= 1100
+    assert history.entries()[-1].pc == 9
+    assert len(history) < 10
+
+
+def test_budget_keeps_newest_entry():
+    history = UndoHistory(max_bytes=10)
+    history.push(make_memory(), 1, make_frames())
+    assert len(history) == 1
+
+
+def test_zero_depth_keeps_nothing():
+    history = UndoHistory(max_depth=0)
+    history.push(make_memory(), 1, make_frames())
+    assert len(history) == 0
+    assert history.memory_usage == 0
+
+
+def test_clear():
+    history = UndoHistory()
+    history.push(make_memory(), 1, make_frames())
+    history.clear()
+    assert len(history) == 0
+    assert history.memory_usage == 0
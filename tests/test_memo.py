@@ -0,0 +1,66 @@
+"""Tests for memo.py (response memoization)."""
+
+from yazm.memo import ResponseCache
+from yazm.saves import MemorySaveBackend
+from yazm.web_adapter import ZorkWebAdapter
+
+from ._sample_data import ZSAMPLE_DATA
+
+COMMANDS = [["open", "mailbox"], ["take", "leaflet"], ["read", "leaflet"], ["north"], ["east"], ["look"]]
+
+
+def play(adapter: ZorkWebAdapter) -> list[str]:
+    adapter.get_intro()
+    return [adapter.execute(c) for c in COMMANDS]
+
+
+def test_hits_replay_the_same_game():
+    cache = ResponseCache()
+    plain = ZorkWebAdapter(ZSAMPLE_DATA)
+    expected = play(plain)
+    first = ZorkWebAdapter(ZSAMPLE_DATA, response_cache=cache)
+    assert play(first) == expected
+    assert cache.stats.misses == len(COMMANDS)
+    assert cache.stats.hits == 0
+
+    second = ZorkWebAdapter(ZSAMPLE_DATA, response_cache=cache)
+    assert play(second) == expected
+    assert cache.stats.hits == len(COMMANDS)
+    assert cache.stats.hit_rate == 0.5
+    assert second._zm.state_hash() == plain._zm.state_hash()
+    # play continues normally from a state reached through hits
+    assert second.execute(["west"]) == plain.execute(["west"])
+
+
+def test_lru_bound():
+    cache = ResponseCache(max_entries=2)
+    play(ZorkWebAdapter(ZSAMPLE_DATA, response_cache=cache))
+    assert len(cache) == 2
+    assert cache.stats.evictions == len(COMMANDS) - 2
+    assert cache.memory_usage > 0
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.memory_usage == 0
+
+
+def test_byte_budget():
+    cache = ResponseCache(max_bytes=0)
+    play(ZorkWebAdapter(ZSAMPLE_DATA, response_cache=cache))
+    assert len(cache) == 0
+
+
+def test_game_end_is_not_stored():
+    cache = ResponseCache()
+    adapter = ZorkWebAdapter(ZSAMPLE_DATA, response_cache=cache)
+    adapter.get_intro()
+    adapter.execute(["quit"])
+    adapter.execute(["y"])
+    assert len(cache) == 1  # the "quit" prompt, not the turn that ended the game
+
+
+def test_bypassed_with_save_backend():
+    cache = ResponseCache()
+    adapter = ZorkWebAdapter(ZSAMPLE_DATA, response_cache=cache, save_backend=MemorySaveBackend())
+    play(adapter)
+    assert cache.stats.misses == 0
+    assert len(cache) == 0
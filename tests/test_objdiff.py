@@ -0,0 +1,83 @@
+"""Tests for objdiff.py (object-state diffs between turns)."""
+
+import pytest
+
+from yazm.objdiff import diff_objects
+from yazm.zmachine import ZMachine
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+@pytest.fixture
+def zm():
+    return ZMachine(ZSAMPLE_DATA)
+
+
+def snapshot_dynamic(zm):
+    return bytes(zm.memory[0 : zm.header.static_memory_addr])
+
+
+def test_layout_covers_all_objects(zm):
+    layout = zm.object_layout
+    assert layout.obj_count == zm.get_total_object_count()
+    assert layout.obj_end == layout.obj_start + layout.obj_count * zm.obj_size
+    assert layout.prop_start >= layout.obj_end
+
+
+def test_layout_is_cached(zm):
+    assert zm.object_layout is zm.object_layout
+
+
+def test_no_changes(zm):
+    before = snapshot_dynamic(zm)
+    assert diff_objects(zm, before, zm.memory) == []
+
+
+def test_attribute_set_and_cleared(zm):
+    zm.clear_attr(5, 3)
+    zm.set_attr(7, 9)
+    before = snapshot_dynamic(zm)
+    zm.set_attr(5, 3)
+    zm.clear_attr(7, 9)
+    changes = {c.number: c for c in diff_objects(zm, before, zm.memory)}
+    assert changes[5].attributes_set == [3]
+    assert changes[7].attributes_cleared == [9]
+    assert changes[5].name == zm.get_object_name(5)
+
+
+def test_object_moved(zm):
+    before = snapshot_dynamic(zm)
+    old_parent = zm.get_parent(89)
+    zm.insert_obj(89, 30)
+    changes = {c.number: c for c in diff_objects(zm, before, zm.memory)}
+    assert changes[89].parent == (old_parent, 30)
+
+
+def test_property_changed(zm):
+    prop = zm.find_prop(1, zm.get_next_prop(1, 0))
+    before = snapshot_dynamic(zm)
+    if prop.length == 1:
+        old = zm.memory.u8(prop.addr)
+        zm.put_prop(1, prop.number, old ^ 0x01)
+    else:
+        old = zm.memory.u16(prop.addr)
+        zm.put_prop(1, prop.number, old ^ 0x0101)
+    changes = diff_objects(zm, before, zm.memory)
+    assert len(changes) == 1
+    assert changes[0].number == 1
+    assert changes[0].properties[prop.number][0] == old
+
+
+def test_diff_against_quetzal(zm):
+    zm.clear_attr(12, 30)
+    saved = zm.make_save_state(zm.pc)
+    zm.set_attr(12, 30)
+    changes = zm.diff_objects(saved)
+    assert [c.number for c in changes] == [12]
+
+
+def test_diff_against_freeze(zm):
+    frozen = zm.freeze()
+    zm.insert_obj(89, 30)
+    changes = zm.diff_objects(frozen)
+    assert 89 in [c.number for c in changes]
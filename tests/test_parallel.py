@@ -0,0 +1,52 @@
+"""Tests for parallel.py (process-pool replays and exploration)."""
+
+import io
+
+import pytest
+
+from yazm.enums import RunStatus
+from yazm.explore import Explorer
+from yazm.parallel import ParallelRunner
+
+from ._sample_data import ZSAMPLE_DATA
+
+COMMANDS = ["north", "south", "open mailbox", "look"]
+
+
+@pytest.fixture(scope="module")
+def runner():
+    with ParallelRunner(ZSAMPLE_DATA, workers=2, commands=COMMANDS) as r:
+        yield r
+
+
+def test_replay_streams_all_results(runner):
+    sequences = [["open mailbox", "take leaflet", "read leaflet"], ["north", "east"], ["quit", "y", "look"]]
+    results = sorted(runner.replay(sequences))
+    assert [r.index for r in results] == [0, 1, 2]
+    explorer = Explorer(ZSAMPLE_DATA)
+    for result, commands in zip(results, sequences, strict=True):
+        assert result.transitions == explorer.replay(explorer.start, commands)
+    assert "leaflet" in results[0].transitions[0].output
+    assert results[2].transitions[-1].status is RunStatus.HALTED
+    assert len(results[2].transitions) == 2  # stopped when the game ended
+    assert {t.state_hash for r in results for t in r.transitions} <= runner.seen
+
+
+def test_explore_matches_sequential(runner):
+    graph, expected_graph = io.StringIO(), io.StringIO()
+    stats = runner.explore(max_depth=2, graph=graph)
+    expected = Explorer(ZSAMPLE_DATA, commands=COMMANDS).run(max_depth=2, graph=expected_graph)
+    assert (stats.states, stats.expanded, stats.transitions, stats.depth) == (
+        expected.states,
+        expected.expanded,
+        expected.transitions,
+        expected.depth,
+    )
+    assert sorted(graph.getvalue().splitlines()) == sorted(expected_graph.getvalue().splitlines())
+    # a second run starts afresh, including the workers' record of what they sent
+    assert runner.explore(max_depth=2).states == stats.states
+
+
+def test_explore_max_states(runner):
+    stats = runner.explore(max_states=5)
+    assert stats.states == 5
@@ -1,5 +1,6 @@
 """Tests for quetzal.py (Quetzal IFF save-file format)."""
 
+import random
 import struct
 
 import pytest
@@ -98,6 +99,75 @@ def test_compress_all_different():
     assert bytes(restored) == dynamic
 
 
+def _reference_compress_cmem(dynamic, original):
+    """Byte-at-a-time CMem encoder the fast path must match exactly."""
+    xor = bytes(a ^ b for a, b in zip(dynamic, original, strict=False)).rstrip(b"\x00")
+    result = bytearray()
+    i = 0
+    while i < len(xor):
+        if xor[i]:
+            result.append(xor[i])
+            i += 1
+            continue
+        run = 0
+        i += 1
+        while i < len(xor) and xor[i] == 0 and run < 255:
+            run += 1
+            i += 1
+        result += bytes([0, run])
+    return bytes(result)
+
+
+@pytest.mark.parametrize("run_length", [1, 255, 256, 257, 512, 513, 1000])
+def test_compress_long_zero_runs_match_reference(run_length):
+    original = bytes(run_length + 2)
+    dynamic = b"\x01" + bytes(run_length) + b"\x02"
+    compressed = quetzal._compress_cmem(dynamic, original)
+    assert compressed == _reference_compress_cmem(dynamic, original)
+    assert bytes(quetzal._decompress_cmem(compressed, original)) == dynamic
+
+
+def test_compress_random_matches_reference():
+    rng = random.Random(1234)
+    original = bytes(rng.randrange(256) for _ in range(4096))
+    for density in (0.0, 0.001, 0.05, 0.5):
+        dynamic = bytearray(original)
+        for i in range(len(dynamic)):
+            if rng.random() < density:
+                dynamic[i] = rng.randrange(256)
+        compressed = quetzal._compress_cmem(dynamic, original)
+        assert compressed == _reference_compress_cmem(dynamic, original)
+        assert bytes(quetzal._decompress_cmem(compressed, original)) == dynamic
+
+
+def test_decompress_trailing_zero_without_count():
+    original = bytes([5, 6, 7])
+    restored = quetzal._decompress_cmem(b"\x01\x00", original)
+    assert bytes(restored) == bytes([4, 6, 7])
+
+
+def test_decompress_ignores_overrun():
+    original = bytes([0, 0])
+    restored = quetzal._decompress_cmem(b"\x01\x02\x03\x04", original)
+    assert bytes(restored) == bytes([1, 2])
+
+
+@pytest.mark.parametrize("addrs", [[0], [5], [0, 1, 2], [3, 300, 301, 1000], [255, 256, 513]])
+def test_sparse_cmem_matches_compress(addrs):
+    original = bytes(1100)
+    dynamic = bytearray(original)
+    for addr in addrs:
+        dynamic[addr] = 0x5A
+    diffs = {addr: 0x5A for addr in addrs}
+    assert quetzal._sparse_cmem(diffs) == quetzal._compress_cmem(dynamic, original)
+
+
+def test_compress_shorter_dynamic():
+    original = bytes([1, 2, 3, 4])
+    dynamic = bytes([1, 9])
+    assert quetzal._compress_cmem(dynamic, original) == _reference_compress_cmem(dynamic, original)
+
+
 # --- save / restore roundtrip ---
 
 
@@ -126,6 +196,47 @@ def test_save_restore_preserves_globals():
     assert zm.read_global(10) == 0xABCD
 
 
+def test_restore_writes_memory_in_place():
+    zm = make_zm()
+    memory = zm.memory
+    zm.write_global(3, 0x4242)
+    data = zm.make_save_state(zm.pc)
+    zm.write_global(3, 0)
+    zm.write_global(4, 0x9999)
+    zm.restore_state(data)
+    assert zm.memory is memory
+    assert zm.read_global(3) == 0x4242
+    assert zm.read_global(4) == make_zm().read_global(4)
+
+
+def test_restore_umem():
+    zm = make_zm()
+    zm.write_global(7, 0x1357)
+    dynamic = bytes(zm.memory[0 : zm.header.static_memory_addr])
+    data = zm.make_save_state(zm.pc)
+    chunks = quetzal._parse_chunks(data[12:])
+    body = quetzal._write_chunk(b"IFhd", chunks[b"IFhd"])
+    body += quetzal._write_chunk(b"UMem", dynamic)
+    body += quetzal._write_chunk(b"Stks", chunks[b"Stks"])
+    umem = b"FORM" + struct.pack(">I", len(body) + 4) + b"IFZS" + body
+    zm.write_global(7, 0)
+    zm.restore_state(umem)
+    assert zm.read_global(7) == 0x1357
+
+
+def test_restore_missing_stks_leaves_memory_untouched():
+    zm = make_zm()
+    zm.write_global(2, 0x1111)
+    data = zm.make_save_state(zm.pc)
+    chunks = quetzal._parse_chunks(data[12:])
+    body = quetzal._write_chunk(b"IFhd", chunks[b"IFhd"]) + quetzal._write_chunk(b"CMem", chunks[b"CMem"])
+    bad = b"FORM" + struct.pack(">I", len(body) + 4) + b"IFZS" + body
+    zm.write_global(2, 0x2222)
+    with pytest.raises(ValueError, match="Missing Stks"):
+        zm.restore_state(bad)
+    assert zm.read_global(2) == 0x2222
+
+
 # --- restore error cases ---
 
 
@@ -0,0 +1,111 @@
+"""Tests for saves.py (save backends)."""
+
+import asyncio
+import os
+
+import pytest
+
+from yazm.saves import FileSaveBackend, MemorySaveBackend, SaveBackend, SQLiteSaveBackend, ThreadedSaveBackend
+from yazm.web_adapter import ZorkWebAdapter
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+@pytest.fixture(params=["file", "memory", "sqlite", "threaded"])
+def backend(request, tmp_path):
+    if request.param == "file":
+        yield FileSaveBackend(str(tmp_path))
+    elif request.param == "memory":
+        yield MemorySaveBackend()
+    elif request.param == "sqlite":
+        sqlite = SQLiteSaveBackend(str(tmp_path / "saves.db"))
+        yield sqlite
+        sqlite.close()
+    else:
+        threaded = ThreadedSaveBackend(MemorySaveBackend())
+        yield threaded
+        threaded.close()
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        SaveBackend()
+
+    class Partial(SaveBackend):
+        def read(self, name):
+            return b""
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_write_read_replace(backend):
+    backend.write("a", b"one")
+    backend.write("a", b"two")
+    backend.write("b", b"three")
+    assert backend.read("a") == b"two"
+    assert backend.names() == ["a", "b"]
+    assert "b" in backend
+    backend.delete("b")
+    assert "b" not in backend
+
+
+def test_missing_save_raises_key_error(backend):
+    with pytest.raises(KeyError):
+        backend.read("missing")
+    with pytest.raises(KeyError):
+        backend.delete("missing")
+
+
+def test_async_interface(backend):
+    async def roundtrip():
+        await backend.awrite("x", b"data")
+        return await backend.aread("x")
+
+    assert asyncio.run(roundtrip()) == b"data"
+
+
+def test_file_write_is_atomic(tmp_path, monkeypatch):
+    backend = FileSaveBackend(str(tmp_path))
+    backend.write("game.sav", b"old")
+
+    def crash(src, dst):
+        raise OSError("disk unplugged")
+
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        backend.write("game.sav", b"new")
+    assert (tmp_path / "game.sav").read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["game.sav"]
+
+
+def test_threaded_write_errors_surface_on_flush():
+    class Failing(MemorySaveBackend):
+        def write(self, name, data):
+            raise OSError("full")
+
+    backend = ThreadedSaveBackend(Failing())
+    backend.write("a", b"x")  # queued, so it does not raise here
+    with pytest.raises(OSError, match="full"):
+        backend.flush()
+    backend.close()
+    with pytest.raises(ValueError, match="closed"):
+        backend.write("a", b"x")
+
+
+def test_in_game_save_and_restore():
+    saves = MemorySaveBackend()
+    a = ZorkWebAdapter(ZSAMPLE_DATA, save_backend=saves, save_name="slot1")
+    a.get_intro()
+    a.execute(["open", "mailbox"])
+    a.execute(["save"])
+    assert "slot1" in saves
+    a.execute(["close", "mailbox"])
+    a.execute(["restore"])
+    assert "leaflet" in a.execute(["look", "in", "mailbox"])
+
+
+def test_in_game_save_disabled_without_backend():
+    a = ZorkWebAdapter(ZSAMPLE_DATA)
+    a.get_intro()
+    assert "Failed" in a.execute(["save"])
@@ -0,0 +1,152 @@
+"""Tests for server.py (asyncio HTTP/JSON game server)."""
+
+import asyncio
+import base64
+import json
+
+from yazm.server import GameServer, LatencyStats
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_session_lifecycle():
+    async def scenario():
+        server = GameServer(ZSAMPLE_DATA, workers=2)
+        status, created = await server.handle("POST", "/sessions")
+        assert status == 200
+        assert "West of House" in created["output"]
+        sid = created["session"]
+        status, result = await server.handle("POST", f"/sessions/{sid}/execute", {"command": "open mailbox"})
+        assert status == 200
+        assert "leaflet" in result["output"]
+        assert result["latency_ms"] >= 0
+
+        _, saved = await server.handle("GET", f"/sessions/{sid}/save")
+        _, other = await server.handle("POST", "/sessions")
+        status, _ = await server.handle("POST", f"/sessions/{other['session']}/load", {"data": saved["data"]})
+        assert status == 200
+        _, result = await server.handle("POST", f"/sessions/{other['session']}/execute", {"command": "take leaflet"})
+        assert "Taken" in result["output"]
+
+        status, _ = await server.handle("DELETE", f"/sessions/{sid}")
+        assert status == 200
+        status, result = await server.handle("POST", f"/sessions/{sid}/execute", {"command": "look"})
+        assert status == 404
+        assert "Unknown session" in result["error"]
+
+        _, stats = await server.handle("GET", "/stats")
+        assert stats["sessions"] == 1
+        assert stats["latency"]["execute"]["count"] == 3
+        await server.close()
+
+    run(scenario())
+
+
+def test_sessions_run_concurrently_and_stay_independent():
+    async def scenario():
+        server = GameServer(ZSAMPLE_DATA, workers=4)
+        ids = [(await server.create_session())["session"] for _ in range(4)]
+        await asyncio.gather(*(server.execute(sid, "open mailbox") for sid in ids[:2]))
+        results = await asyncio.gather(*(server.execute(sid, "look in mailbox") for sid in ids))
+        assert ["leaflet" in r["output"] for r in results] == [True, True, False, False]
+        await server.close()
+
+    run(scenario())
+
+
+def test_bad_requests():
+    async def scenario():
+        server = GameServer(ZSAMPLE_DATA)
+        sid = (await server.create_session())["session"]
+        assert (await server.handle("GET", "/nowhere"))[0] == 404
+        assert (await server.handle("GET", "/sessions"))[0] == 405
+        assert (await server.handle("POST", f"/sessions/{sid}/execute", {}))[0] == 400
+        assert (await server.handle("POST", f"/sessions/{sid}/load", {"data": "!!"}))[0] == 400
+        assert (await server.handle("POST", f"/sessions/{sid}/load", {"data": "AAAA"}))[0] == 400
+        json_snapshot = b'{"memory":"AAAA","pc":1,"frames":[[1]],"rng_state":[3,[1],null]}'
+        for snapshot in (b"{}", b"[]", b"null", json_snapshot, b"YZSN\x01"):  # JSON is not accepted
+            data = base64.b64encode(snapshot).decode("ascii")
+            status, result = await server.handle("POST", f"/sessions/{sid}/load", {"data": data})
+            assert status == 400, result
+        # a failed load leaves the session playable
+        assert "leaflet" in (await server.execute(sid, "open mailbox"))["output"]
+        await server.close()
+
+    run(scenario())
+
+
+def test_unexpected_error_is_500_with_latency():
+    async def scenario():
+        server = GameServer(ZSAMPLE_DATA)
+        sid = (await server.create_session())["session"]
+
+        def broken(*args):
+            raise RuntimeError("adapter exploded")
+
+        server.sessions[sid].adapter.execute = broken
+        status, result = await server.handle("POST", f"/sessions/{sid}/execute", {"command": "look"})
+        assert status == 500
+        assert result["error"] == "adapter exploded"
+        assert result["latency_ms"] >= 0
+        assert server.latency["execute"].count == 1
+        await server.close()
+
+    run(scenario())
+
+
+async def http(host, port, method, path, body=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    payload = json.dumps(body).encode() if body is not None else b""
+    head = f"{method} {path} HTTP/1.1\r\nContent-Length: {len(payload)}\r\nConnection: close\r\n\r\n"
+    writer.write(head.encode() + payload)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, content = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def test_http_over_socket():
+    async def scenario():
+        server = GameServer(ZSAMPLE_DATA)
+        await server.start(port=0)
+        host, port = server.address
+        status, created = await http(host, port, "POST", "/sessions")
+        assert status == 200
+        status, result = await http(host, port, "POST", f"/sessions/{created['session']}/execute", {"command": "n"})
+        assert status == 200
+        assert "North of House" in result["output"]
+        status, _ = await http(host, port, "GET", "/stats")
+        assert status == 200
+        await server.close()
+
+    run(scenario())
+
+
+def test_latency_stats():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record(ms / 1000)
+    summary = stats.summary()
+    assert summary["count"] == 100
+    assert summary["max_ms"] == 100
+    assert 50 <= summary["p50_ms"] <= 51
+    assert 95 <= summary["p95_ms"] <= 96
+
+
+def test_runaway_turn_closes_session():
+    from .test_web_adapter import runaway_story
+
+    async def scenario():
+        server = GameServer(runaway_story(), turn_instructions=5000)
+        status, result = await server.handle("POST", "/sessions")
+        assert status == 503
+        assert "session closed" in result["error"]
+        assert server.sessions == {}
+        await server.close()
+
+    run(scenario())
@@ -0,0 +1,105 @@
+"""Tests for session_cache.py (LRU session hibernation)."""
+
+import threading
+
+import pytest
+
+from yazm.saves import FileSaveBackend, MemorySaveBackend
+from yazm.session_cache import SessionCache
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+def test_lru_hibernates_and_thaws(tmp_path):
+    backend = FileSaveBackend(str(tmp_path))
+    cache = SessionCache(ZSAMPLE_DATA, backend, max_live=2)
+    a, _ = cache.create("a")
+    cache.execute(a, "open mailbox")
+    cache.create("b")
+    cache.execute("b", "north")
+    cache.create("c")  # evicts a, the least recently used
+    assert len(cache) == 2
+    assert backend.names() == ["a"]
+    assert cache.stats.evictions == 1
+
+    assert "leaflet" in cache.execute("a", "look in mailbox")  # thawed transparently
+    assert cache.stats.misses == 1
+    assert cache.stats.thaws == 1
+    assert cache.stats.max_thaw_seconds > 0
+    assert "b" in backend.names()  # b was least recently used when a came back
+    assert cache.stats.hits == 2
+
+
+def test_memory_budget():
+    cache = SessionCache(ZSAMPLE_DATA, MemorySaveBackend(), max_bytes=len(ZSAMPLE_DATA) * 2)
+    for name in "abcd":
+        cache.create(name)
+    assert len(cache) == 2
+    assert cache.live_bytes <= cache.max_bytes
+    assert cache.stats.evictions == 2
+
+
+def test_session_in_use_is_not_evicted():
+    cache = SessionCache(ZSAMPLE_DATA, MemorySaveBackend(), max_live=1)
+    cache.create("a")
+    with cache.session("a") as adapter:
+        cache.create("b")  # a is pinned, so the newer b is hibernated instead
+        assert "leaflet" in adapter.execute(["open", "mailbox"])
+    assert cache.backend.names() == ["b"]
+    assert "leaflet" in cache.execute("a", "look in mailbox")
+
+
+def test_hibernate_all_and_delete():
+    cache = SessionCache(ZSAMPLE_DATA, MemorySaveBackend())
+    cache.create("a")
+    cache.hibernate_all()
+    assert len(cache) == 0
+    assert cache.live_bytes == 0
+    assert "a" in cache
+    cache.delete("a")
+    assert "a" not in cache
+    with pytest.raises(KeyError, match="Unknown session"):
+        cache.execute("a", "look")
+    with pytest.raises(KeyError):
+        cache.delete("a")
+
+
+class BlockingBackend(MemorySaveBackend):
+    """Writes wait for ``release`` once ``block`` is set."""
+
+    def __init__(self):
+        super().__init__()
+        self.block = False
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, name, data):
+        if self.block:
+            self.writing.set()
+            assert self.release.wait(5)
+        super().write(name, data)
+
+
+def test_thaw_waits_for_hibernation_write():
+    backend = BlockingBackend()
+    cache = SessionCache(ZSAMPLE_DATA, backend, max_live=1)
+    cache.create("a")
+    cache.execute("a", "open mailbox")
+    backend.block = True
+    creator = threading.Thread(target=cache.create, args=("b",))  # evicts a; its write blocks
+    creator.start()
+    assert backend.writing.wait(5)
+
+    # the write runs outside the cache lock: the live session b stays usable
+    assert "mailbox" in cache.execute("b", "look")
+
+    outputs = []
+    thawer = threading.Thread(target=lambda: outputs.append(cache.execute("a", "take leaflet")))
+    thawer.start()
+    thawer.join(0.2)
+    assert thawer.is_alive()  # a cannot be thawed before its snapshot is written
+    backend.block = False
+    backend.release.set()
+    creator.join(5)
+    thawer.join(5)
+    assert outputs and "Taken" in outputs[0]
@@ -0,0 +1,62 @@
+"""Tests for sharding.py (process-pool session sharding)."""
+
+import pytest
+
+from yazm.sharding import ShardedSessions
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+@pytest.fixture(scope="module")
+def shards():
+    with ShardedSessions(ZSAMPLE_DATA, workers=2) as s:
+        yield s
+
+
+def test_sessions_spread_and_stick(shards):
+    a, intro = shards.create()
+    b, _ = shards.create()
+    assert "West of House" in intro
+    assert shards.worker_of(a) != shards.worker_of(b)
+    assert "leaflet" in shards.execute(a, "open mailbox")
+    assert "leaflet" in shards.execute(a, "look in mailbox")
+    assert "closed" in shards.execute(b, "look in mailbox")
+    shards.delete(a)
+    shards.delete(b)
+
+
+def test_migrate_keeps_state(shards):
+    sid, _ = shards.create()
+    shards.execute(sid, "open mailbox")
+    source = shards.worker_of(sid)
+    shards.migrate(sid, 1 - source)
+    assert shards.worker_of(sid) == 1 - source
+    assert "leaflet" in shards.execute(sid, "look in mailbox")
+    shards.delete(sid)
+
+
+def test_rebalance_and_load_report(shards):
+    ids = [shards.create()[0] for _ in range(4)]
+    for sid in ids:
+        shards.execute(sid, "look")
+    for sid in [s for s in ids if shards.worker_of(s) == 0]:
+        shards.delete(sid)
+        ids.remove(sid)
+    assert shards.rebalance() == 1
+    report = shards.load_report()
+    assert [w["sessions"] for w in report] == [1, 1]
+    assert all(w["turns"] >= 1 and w["busy_seconds"] > 0 for w in report)
+    for sid in ids:
+        shards.delete(sid)
+
+
+def test_errors(shards):
+    with pytest.raises(KeyError, match="Unknown session"):
+        shards.execute("missing", "look")
+    sid, _ = shards.create()
+    with pytest.raises(ValueError, match="already exists"):
+        shards.create(sid)
+    with pytest.raises(ValueError):
+        shards.load(sid, b"not a snapshot")
+    assert "West of House" in shards.execute(sid, "look")
+    shards.delete(sid)
@@ -1,9 +1,12 @@
 """Tests for snapshot.py (freeze/thaw JSON serialization)."""
 
+import base64
 import json
 
 import pytest
 
+from yazm import snapshot
+from yazm.frame import Frame
 from yazm.zmachine import ZMachine
 
 from ._sample_data import ZSAMPLE_DATA
@@ -46,8 +49,89 @@ def test_freeze_thaw_roundtrip(zm):
     assert zm.read_global(5) == 0x1234
 
 
+@pytest.mark.parametrize("change", ["high", "length"])
+def test_thaw_rejects_memory_not_matching_story(zm, change):
+    state = json.loads(zm.freeze())
+    memory = bytearray(base64.b64decode(state["memory"]))
+    if change == "high":
+        memory[zm.pc] ^= 0xFF
+    else:
+        memory += b"\x00"
+    state["memory"] = base64.b64encode(memory).decode("ascii")
+    other = ZMachine(ZSAMPLE_DATA)
+    with pytest.raises(ValueError, match="different story"):
+        other.thaw(json.dumps(state))
+    assert other.memory == zm.memory
+
+
 def test_freeze_thaw_frame_count(zm):
     original_frame_count = len(zm.frames)
     frozen = zm.freeze()
     zm.thaw(frozen)
     assert len(zm.frames) == original_frame_count
+
+
+# --- binary format ---
+
+
+def test_freeze_binary_header(zm):
+    data = zm.freeze_binary()
+    assert data[:4] == snapshot.BINARY_MAGIC
+    assert snapshot.is_binary(data)
+    assert not snapshot.is_binary(zm.freeze().encode("utf-8"))
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_freeze_thaw_binary_roundtrip(zm, compress):
+    zm.write_global(5, 0x1234)
+    zm.frames.append(Frame(resume=0x4321, store=3, locals_=[1, 2], arguments=[7]))
+    zm.stack_push(99)
+    zm.rng.random()
+    rng_state = zm.rng.getstate()
+    data = zm.freeze_binary(compress=compress)
+
+    other = ZMachine(ZSAMPLE_DATA)
+    other.thaw_binary(data)
+    assert other.read_global(5) == 0x1234
+    assert other.pc == zm.pc
+    assert [f.to_list() for f in other.frames] == [f.to_list() for f in zm.frames]
+    assert other.rng.getstate() == rng_state
+    assert other.memory == zm.memory
+
+
+def test_binary_is_smaller_than_json(zm):
+    zm.write_global(5, 0x1234)
+    assert len(zm.freeze_binary()) * 10 < len(zm.freeze())
+
+
+def test_thaw_binary_preserves_gauss_next(zm):
+    zm.rng.gauss(0, 1)
+    state = zm.rng.getstate()
+    other = ZMachine(ZSAMPLE_DATA)
+    other.thaw_binary(zm.freeze_binary())
+    assert other.rng.getstate() == state
+
+
+def test_thaw_binary_rejects_bad_magic(zm):
+    with pytest.raises(ValueError, match="Not a binary snapshot"):
+        zm.thaw_binary(b"nonsense" * 4)
+
+
+def test_thaw_binary_rejects_other_version(zm):
+    data = bytearray(zm.freeze_binary())
+    data[4] = 99
+    with pytest.raises(ValueError, match="Unsupported snapshot version"):
+        zm.thaw_binary(bytes(data))
+
+
+def test_thaw_binary_rejects_other_story(zm):
+    data = bytearray(zm.freeze_binary())
+    data[7] ^= 0xFF  # release number
+    with pytest.raises(ValueError, match="different story"):
+        zm.thaw_binary(bytes(data))
+
+
+def test_thaw_binary_rejects_truncated(zm):
+    data = zm.freeze_binary(compress=False)
+    with pytest.raises(ValueError, match="truncated"):
+        zm.thaw_binary(data[:-10])
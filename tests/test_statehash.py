@@ -0,0 +1,75 @@
+"""Tests for statehash.py (incremental state hashing)."""
+
+from random import Random
+
+import pytest
+
+from yazm import statehash
+from yazm.web_adapter import ZorkWebAdapter
+from yazm.zmachine import ZMachine
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+@pytest.fixture
+def zm():
+    return ZMachine(ZSAMPLE_DATA)
+
+
+def test_state_hash_tracks_state(zm):
+    other = zm.clone()
+    assert zm.state_hash() == other.state_hash()
+    other.write_global(0, other.read_global(0) ^ 1)
+    assert zm.state_hash() != other.state_hash()
+    other = zm.clone()
+    other.rng.random()
+    assert zm.state_hash() != other.state_hash()
+    other = zm.clone()
+    other.stack_push(1)
+    assert zm.state_hash() != other.state_hash()
+    other = zm.clone()
+    other.pc += 1
+    assert zm.state_hash() != other.state_hash()
+
+
+def test_incremental_hash_matches_full_hash():
+    adapter = ZorkWebAdapter(ZSAMPLE_DATA)
+    adapter.get_intro()
+    zm = adapter._zm
+    zm.options.verify_state_hash = True
+    seen = {zm.state_hash()}
+    for command in (["open", "mailbox"], ["take", "leaflet"], ["north"], ["east"], ["open", "window"]):
+        adapter.execute(command)
+        seen.add(zm.state_hash())
+    assert len(seen) == 6
+
+
+def test_hash_returns_after_rollback(zm):
+    before = zm.state_hash()
+    zm.checkpoint()
+    zm.write_global(3, 1234)
+    zm.memory.write_bulk(0x40, bytes(64))
+    zm.rng.randint(1, 6)
+    assert zm.state_hash(verify=True) != before
+    zm.rollback()
+    assert zm.state_hash(verify=True) == before
+
+
+def test_hash_is_reproducible(zm):
+    # independent of the process, object identity and which path computed it
+    assert zm.state_hash() == statehash.full_hash(ZMachine(ZSAMPLE_DATA))
+
+
+def test_plain_random_is_rehashed(zm):
+    zm.rng = Random()
+    zm.rng.seed(1)
+    first = zm.state_hash(verify=True)
+    zm.rng.random()
+    assert zm.state_hash(verify=True) != first
+
+
+def test_verify_catches_untracked_writes(zm):
+    zm.state_hash()
+    bytearray.__setitem__(zm.memory, 0x40, zm.memory[0x40] ^ 0xFF)
+    with pytest.raises(ValueError, match="does not match"):
+        zm.state_hash(verify=True)
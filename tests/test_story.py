@@ -0,0 +1,84 @@
+"""Tests for story.py (shared StoryImage)."""
+
+from yazm.story import StoryImage, load_story
+from yazm.web_adapter import ZorkWebAdapter
+from yazm.zmachine import ZMachine
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+def test_story_image_basics():
+    story = StoryImage(ZSAMPLE_DATA)
+    assert len(story) == len(ZSAMPLE_DATA)
+    assert story.header.version == 3
+    assert story.original_dynamic == ZSAMPLE_DATA[0 : story.static_memory_addr]
+    assert story.dictionary is None
+
+
+def test_sessions_share_story_data():
+    story = StoryImage(ZSAMPLE_DATA)
+    first = ZMachine(story)
+    second = ZMachine(story)
+    assert first.story is second.story
+    assert first.original_memory is second.original_memory
+    assert first.original_dynamic is second.original_dynamic
+    assert first.dictionary is second.dictionary is story.dictionary
+    assert first.separators is second.separators
+    assert first.object_layout is second.object_layout
+
+
+def test_sessions_have_independent_memory():
+    story = StoryImage(ZSAMPLE_DATA)
+    first = ZMachine(story)
+    second = ZMachine(story)
+    first.write_global(3, 0x1234)
+    assert second.read_global(3) != 0x1234
+    assert story.original_memory.u16(story.header.global_variable_addr + 6) == second.read_global(3)
+
+
+def test_zmachine_from_bytes_builds_own_image():
+    assert ZMachine(ZSAMPLE_DATA).story is not ZMachine(ZSAMPLE_DATA).story
+
+
+def test_load_story_is_cached():
+    assert load_story(ZSAMPLE_DATA) is load_story(ZSAMPLE_DATA)
+
+
+def test_adapters_share_story():
+    first = ZorkWebAdapter(ZSAMPLE_DATA)
+    second = ZorkWebAdapter(ZSAMPLE_DATA)
+    assert first._zm.story is second._zm.story
+
+
+def test_instruction_cache_only_for_static_memory():
+    story = StoryImage(ZSAMPLE_DATA)
+    zm = ZMachine(story)
+    instr = zm.decode_instruction(zm.pc)
+    assert zm.pc >= story.static_memory_addr
+    assert story.instructions[zm.pc] is instr
+    assert zm.decode_instruction(zm.pc) is instr
+    zm.memory.write_u8(0x200, 0xBA)  # quit, in dynamic memory
+    zm.decode_instruction(0x200)
+    assert 0x200 not in story.instructions
+
+
+def test_string_cache_only_for_static_memory():
+    story = StoryImage(ZSAMPLE_DATA)
+    adapter = ZorkWebAdapter(story)
+    adapter.get_intro()
+    assert story.strings
+    assert min(story.strings) >= story.static_memory_addr
+    addr, text = next(iter(story.strings.items()))
+    assert ZMachine(story).read_zstring(addr) == text
+    dynamic_addr = ZMachine(story).get_object_prop_table_addr(1) + 1
+    ZMachine(story).read_zstring(dynamic_addr)
+    assert dynamic_addr not in story.strings
+
+
+def test_checksum_matches_bytewise_sum():
+    story = StoryImage(ZSAMPLE_DATA)
+    expected = 0
+    for i in range(0x40, story.header.file_length):
+        expected += story.original_memory.u8(i)
+    assert story.checksum == expected % 0x1_0000
+    assert ZMachine(story).calculate_checksum() == story.checksum
@@ -0,0 +1,203 @@
+"""Tests for web_adapter.py (ZorkWebAdapter)."""
+
+import pytest
+
+from yazm.saves import FileSaveBackend, MemorySaveBackend
+from yazm.story import StoryImage, load_story
+from yazm.web_adapter import TurnLimitExceeded, ZorkWebAdapter
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+@pytest.fixture
+def adapter():
+    a = ZorkWebAdapter(ZSAMPLE_DATA)
+    a.get_intro()
+    return a
+
+
+def test_get_intro():
+    a = ZorkWebAdapter(ZSAMPLE_DATA)
+    assert "West of House" in a.get_intro()
+
+
+def test_cached_intro_does_not_share_save_backends():
+    story = StoryImage(bytes(ZSAMPLE_DATA))
+    backend = MemorySaveBackend()
+    first = ZorkWebAdapter(story, save_backend=backend)
+    first.get_intro()
+    second = ZorkWebAdapter(story)
+    second.get_intro()
+    third = ZorkWebAdapter(story, save_backend=MemorySaveBackend())
+    third.get_intro()
+    assert first._zm.save_backend is backend
+    assert isinstance(second._zm.save_backend, FileSaveBackend)
+    assert third._zm.save_backend is third.save_backend
+    assert story.intro_states and all(
+        template.save_backend is not backend for template, _ in story.intro_states.values()
+    )
+
+
+def test_intro_state_is_cached_per_story():
+    story = load_story(ZSAMPLE_DATA)
+    first = ZorkWebAdapter(story)
+    intro = first.get_intro()
+    assert len(story.intro_states) == 1
+    first.execute(["open", "mailbox"])
+    second = ZorkWebAdapter(story)
+    assert second.get_intro() == intro
+    # the second session starts from the cached state, unaffected by the first
+    assert "closed" in second.execute(["look", "in", "mailbox"])
+    fresh = ZorkWebAdapter(ZSAMPLE_DATA)
+    assert fresh.get_intro() == intro
+    fresh.execute(["look", "in", "mailbox"])
+    assert second.execute(["open", "mailbox"]) == fresh.execute(["open", "mailbox"])
+    assert second._zm.memory == fresh._zm.memory
+
+
+def test_execute(adapter):
+    output = adapter.execute(["open", "mailbox"])
+    assert "leaflet" in output
+
+
+def test_admin_save_load(adapter):
+    adapter.execute(["open", "mailbox"])
+    saved = adapter.admin_save()
+    other = ZorkWebAdapter(ZSAMPLE_DATA)
+    other.admin_load(saved)
+    assert "leaflet" in other.execute(["look", "in", "mailbox"])
+
+
+def test_track_object_changes():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, track_object_changes=True)
+    a.get_intro()
+    a.execute(["open", "mailbox"])
+    a.execute(["take", "leaflet"])
+    leaflet = [c for c in a.last_object_changes if c.name == "leaflet"]
+    assert leaflet
+    assert leaflet[0].parent is not None
+
+
+def test_object_changes_off_by_default(adapter):
+    adapter.execute(["open", "mailbox"])
+    assert adapter.last_object_changes == []
+
+
+def test_admin_save_load_binary():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, snapshot_format="binary")
+    a.get_intro()
+    a.execute(["open", "mailbox"])
+    saved = a.admin_save()
+    assert saved[:4] == b"YZSN"
+    other = ZorkWebAdapter(ZSAMPLE_DATA)
+    other.admin_load(saved)
+    assert "leaflet" in other.execute(["look", "in", "mailbox"])
+
+
+def test_unknown_snapshot_format():
+    with pytest.raises(ValueError, match="Unknown snapshot format"):
+        ZorkWebAdapter(ZSAMPLE_DATA, snapshot_format="xml")
+
+
+def test_undo_redo():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, undo_depth=5)
+    a.get_intro()
+    a.execute(["open", "mailbox"])
+    a.execute(["take", "leaflet"])
+    assert a.undo() is True
+    assert a.undo() is True
+    assert a.undo() is False
+    assert a.redo() is True
+    assert a.redo() is True
+    assert a.redo() is False
+    assert a.undo() is True
+    assert a.undo() is True
+    assert "closed" in a.execute(["look", "in", "mailbox"])
+    assert a.redo() is False  # the new command discarded the redo history
+    a.execute(["open", "mailbox"])
+    a.execute(["take", "leaflet"])
+    assert a.undo() is True
+    assert "leaflet" in a.execute(["look", "in", "mailbox"])
+    assert a.undo() is True
+    assert a.redo() is True
+    assert "leaflet" in a.execute(["look", "in", "mailbox"])
+
+
+def test_undo_depth_bounds_history():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, undo_depth=2)
+    a.get_intro()
+    for _ in range(4):
+        a.execute(["look"])
+    assert a.undo() is True
+    assert a.undo() is True
+    assert a.undo() is False
+
+
+def test_undo_disabled_by_default(adapter):
+    adapter.execute(["open", "mailbox"])
+    assert adapter.undo() is False
+
+
+def test_game_undo_unaffected_by_adapter_history(adapter):
+    # undo_depth=0 only disables the adapter's history; the game's save_undo keeps its own
+    zm = adapter._zm
+    zm.save_undo(zm.pc)
+    assert len(zm.undos) == 1
+    assert zm.undo() is True
+
+
+def test_adapter_undo_points_kept_apart_from_game_undos():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, undo_depth=5)
+    a.get_intro()
+    a.execute(["open", "mailbox"])
+    a.execute(["take", "leaflet"])
+    assert len(a._zm.undos) == 0
+    assert a.undo() is True
+    assert len(a._zm.redos) == 0
+
+
+def test_execute_many_matches_execute(adapter):
+    commands = [["open", "mailbox"], ["take", "leaflet"], ["read", "leaflet"]]
+    expected = [adapter.execute(c) for c in commands]
+    other = ZorkWebAdapter(ZSAMPLE_DATA)
+    other.get_intro()
+    assert other.execute_many(commands) == expected
+    assert other.execute(["drop", "leaflet"]) == adapter.execute(["drop", "leaflet"])
+
+
+def test_execute_many_stops_when_game_ends(adapter):
+    outputs = adapter.execute_many([["quit"], ["y"], ["look"]])
+    assert len(outputs) == 2
+
+
+def test_execute_many_with_undo():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, undo_depth=5)
+    a.get_intro()
+    a.execute_many([["open", "mailbox"], ["take", "leaflet"]])
+    assert a.undo() is True
+    assert "leaflet" in a.execute(["look", "in", "mailbox"])
+
+
+def runaway_story() -> bytes:
+    """The sample story with its first instruction replaced by a jump to itself."""
+    data = bytearray(ZSAMPLE_DATA)
+    pc = data[6] << 8 | data[7]
+    data[pc : pc + 3] = b"\x8c\xff\xff"
+    return bytes(data)
+
+
+def test_turn_limit_stops_runaway_story():
+    a = ZorkWebAdapter(runaway_story(), turn_instructions=5000)
+    with pytest.raises(TurnLimitExceeded, match="instruction budget"):
+        a.get_intro()
+    with pytest.raises(TurnLimitExceeded):
+        a.resume()
+    a = ZorkWebAdapter(runaway_story(), turn_timeout=0.01)
+    with pytest.raises(TurnLimitExceeded, match="time limit"):
+        a.get_intro()
+
+
+def test_turn_limit_allows_normal_turns():
+    a = ZorkWebAdapter(ZSAMPLE_DATA, turn_instructions=100_000, turn_timeout=10)
+    assert "West of House" in a.get_intro()
+    assert "leaflet" in a.execute_many([["open", "mailbox"]])[0]
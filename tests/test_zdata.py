@@ -1,3 +1,5 @@
+import pytest
+
 from yazm.zdata import ZData
 
 
@@ -98,3 +100,162 @@ def test_writer_from_offset():
     writer.byte(0x99)
     assert zdata.u8(3) == 0x99
     assert zdata.u8(0) == 0x00  # untouched
+
+
+# --- watchpoints ---
+
+
+def test_no_watches_uses_plain_class():
+    zdata = ZData(bytearray(4))
+    assert type(zdata) is ZData
+    assert zdata.watches == []
+
+
+def test_watch_u8():
+    zdata = ZData(bytearray(8))
+    seen = []
+    zdata.add_watch(2, 4, lambda addr, old, new: seen.append((addr, old, new)))
+    zdata.write_u8(1, 0x11)  # outside range
+    zdata.write_u8(3, 0x22)
+    assert seen == [(3, 0x00, 0x22)]
+
+
+def test_watch_u16_overlap():
+    zdata = ZData(bytearray([0, 0, 0xAB, 0xCD]))
+    seen = []
+    zdata.add_watch(3, 4, lambda addr, old, new: seen.append((addr, old, new)))
+    zdata.write_u16(2, 0x1234)
+    assert seen == [(2, 0xABCD, 0x1234)]
+    assert zdata.u16(2) == 0x1234
+
+
+def test_watch_bulk():
+    zdata = ZData(bytearray(6))
+    seen = []
+    zdata.add_watch(0, 2, lambda addr, old, new: seen.append((addr, old, new)))
+    zdata.write_bulk(1, b"\x01\x02\x03")
+    zdata.write_bulk(3, b"\x09")  # outside range
+    assert seen == [(1, b"\x00\x00\x00", b"\x01\x02\x03")]
+
+
+def test_watch_via_writer():
+    zdata = ZData(bytearray(4))
+    seen = []
+    zdata.add_watch(0, 4, lambda addr, old, new: seen.append(addr))
+    writer = zdata.get_writer(0)
+    writer.byte(1)
+    writer.word(2)
+    assert seen == [0, 1]
+
+
+def test_remove_watch_restores_plain_class():
+    zdata = ZData(bytearray(4))
+    seen = []
+    first = zdata.add_watch(0, 4, lambda addr, old, new: seen.append("first"))
+    second = zdata.add_watch(0, 4, lambda addr, old, new: seen.append("second"))
+    zdata.remove_watch(first)
+    assert type(zdata) is not ZData
+    zdata.write_u8(0, 1)
+    assert seen == ["second"]
+    zdata.remove_watch(second)
+    assert type(zdata) is ZData
+    zdata.write_u8(0, 2)
+    assert seen == ["second"]
+
+
+# --- write journal ---
+
+
+def test_journal_off_by_default():
+    zdata = ZData(bytearray(4))
+    assert not zdata.journaling
+    assert zdata.journal_changes() == {}
+    zdata.rollback()  # no-op
+
+
+def test_journal_records_writes():
+    zdata = ZData(bytearray([1, 2, 3, 4]))
+    zdata.start_journal()
+    assert type(zdata) is not ZData
+    zdata.write_u8(0, 9)
+    zdata.write_u16(2, 0xAABB)
+    assert zdata.journal_position == 3
+    assert zdata.journal_changes() == {0: 1, 2: 3, 3: 4}
+
+
+def test_journal_changes_keep_first_value_and_skip_restored():
+    zdata = ZData(bytearray([1, 2]))
+    zdata.start_journal()
+    zdata.write_u8(0, 5)
+    zdata.write_u8(0, 6)
+    zdata.write_u8(1, 7)
+    zdata.write_u8(1, 2)
+    assert zdata.journal_changes() == {0: 1}
+
+
+def test_journal_bulk_records_changed_bytes_only():
+    zdata = ZData(bytearray([1, 2, 3, 4]))
+    zdata.start_journal()
+    zdata.write_bulk(0, bytes([1, 9, 3, 8]))
+    assert zdata.journal_position == 2
+    assert zdata.journal_changes() == {1: 2, 3: 4}
+
+
+def test_journal_rollback():
+    zdata = ZData(bytearray([1, 2, 3, 4]))
+    zdata.start_journal()
+    zdata.write_u16(0, 0xFFFF)
+    mark = zdata.journal_position
+    zdata.write_bulk(2, b"\x00\x00")
+    zdata.rollback(mark)
+    assert bytes(zdata) == bytes([0xFF, 0xFF, 3, 4])
+    assert zdata.journal_position == mark
+    zdata.rollback()
+    assert bytes(zdata) == bytes([1, 2, 3, 4])
+    assert zdata.journaling
+
+
+def test_journal_checkpoint():
+    zdata = ZData(bytearray(2))
+    zdata.start_journal()
+    epoch = zdata.journal_epoch
+    zdata.write_u8(0, 1)
+    assert zdata.checkpoint() == {0: 0}
+    assert zdata.journal_position == 0
+    assert zdata.journal_epoch == epoch + 1
+    zdata.rollback()
+    assert zdata[0] == 1
+
+
+def test_journal_with_watch():
+    zdata = ZData(bytearray(2))
+    seen = []
+    watch = zdata.add_watch(0, 2, lambda addr, old, new: seen.append((addr, old, new)))
+    zdata.start_journal()
+    zdata.write_u8(1, 5)
+    zdata.rollback()
+    assert seen == [(1, 0, 5), (1, 5, 0)]
+    zdata.stop_journal()
+    assert type(zdata) is not ZData
+    zdata.remove_watch(watch)
+    assert type(zdata) is ZData
+
+
+# --- dirty pages ---
+
+
+def test_page_tracking():
+    zdata = ZData(bytearray(1024))
+    with pytest.raises(ValueError):
+        zdata.take_dirty_pages()
+    zdata.start_page_tracking()
+    assert zdata.tracking_pages
+    assert type(zdata) is not ZData
+    zdata.write_u8(3, 1)
+    zdata.write_u16(0x1FF, 0x1234)  # straddles pages 1 and 2
+    assert zdata.take_dirty_pages() == {0, 1, 2}
+    assert zdata.take_dirty_pages() == set()
+    zdata.write_bulk(0x2FF, b"\x00\x00")
+    assert zdata.take_dirty_pages() == {2, 3}
+    zdata.stop_page_tracking()
+    assert type(zdata) is ZData
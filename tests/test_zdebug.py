@@ -88,22 +88,31 @@ def test_debug_redo_empty(zm):
 
 
 def test_debug_undo_after_save(zm):
-    state = zm.make_save_state(zm.pc)
-    zm.undos.append(state)
+    zm.save_undo(zm.pc)
     zm.debugger.debug_undo()
     output = " ".join(zm.ui.output)
     assert "Undo successful" in output
 
 
 def test_debug_redo_after_undo(zm):
-    state = zm.make_save_state(zm.pc)
-    zm.undos.append(state)
+    zm.save_undo(zm.pc)
     zm.undo()
     zm.debugger.debug_redo()
     output = " ".join(zm.ui.output)
     assert "Redo successful" in output
 
 
+def test_debug_history(zm):
+    zm.save_undo(zm.pc)
+    zm.write_global(3, 7)
+    zm.save_undo(0x1234)
+    zm.debugger.debug_history()
+    output = "".join(zm.ui.output)
+    assert "Undo history: 2 entries" in output
+    assert "pc=0x1234" in output
+    assert "Redo history: 0 entries" in output
+
+
 def test_debug_dictionary_output(zm):
     zm.debugger.debug_dictionary()
     assert len(zm.ui.output) > 0
@@ -1,7 +1,11 @@
+import time
+
 import pytest
 
-from yazm.enums import Opcode, OperandType
+from yazm.enums import Opcode, OperandType, RunStatus
 from yazm.frame import Frame
+from yazm.options import Options
+from yazm.story import load_story
 from yazm.zinstruction import Instruction
 from yazm.zmachine import ZMachine
 
@@ -617,12 +621,263 @@ def test_redo_empty(sample_zmachine):
 
 def test_undo_redo_cycle(sample_zmachine):
     zm = sample_zmachine
-    state = zm.make_save_state(zm.pc)
-    zm.undos.append(state)
+    zm.save_undo(zm.pc)
     assert zm.undo() is True
     assert zm.redo() is True
 
 
+def test_undo_restores_memory_and_frames(sample_zmachine):
+    zm = sample_zmachine
+    zm.write_global(4, 0x1111)
+    zm.save_undo(0x2000)
+    zm.write_global(4, 0x2222)
+    zm.stack_push(5)
+    zm.pc = 0x3000
+    assert zm.undo() is True
+    assert zm.read_global(4) == 0x1111
+    assert zm.pc == 0x2000
+    assert zm.frames[0].stack == []
+    assert zm.redo() is True
+    assert zm.read_global(4) == 0x2222
+    assert zm.pc == 0x3000
+    assert zm.frames[0].stack == [5]
+
+
+def test_undo_history_depth_from_options():
+    options = Options.default()
+    options.undo_depth = 3
+    options.undo_budget = 1 << 16
+    zm = ZMachine(ZSAMPLE_DATA, options)
+    assert zm.options is options
+    assert (zm.undos.max_depth, zm.undos.max_bytes) == (3, 1 << 16)
+    assert (zm.redos.max_depth, zm.redos.max_bytes) == (3, 1 << 16)
+    for i in range(10):
+        zm.write_global(1, i)
+        zm.save_undo(zm.pc)
+    assert len(zm.undos) == 3
+
+
+def test_rand_seed_from_options():
+    options = Options.default()
+    options.rand_seed = bytearray([1, 2, 3])
+    rolls = [ZMachine(ZSAMPLE_DATA, options).rng.random() for _ in range(2)]
+    assert rolls[0] == rolls[1] != ZMachine(ZSAMPLE_DATA).rng.random()
+
+
+def test_write_journal_from_options():
+    options = Options.default()
+    options.write_journal = True
+    zm = ZMachine(ZSAMPLE_DATA, options)
+    assert zm.memory.journaling
+    zm.write_global(2, 7)
+    assert zm.memory.journal_position > 0
+    assert not ZMachine(ZSAMPLE_DATA).memory.journaling
+
+
+def test_journaled_undo_matches_full_compare():
+    journaled = ZMachine(ZSAMPLE_DATA)
+    journaled.memory.start_journal()
+    plain = ZMachine(ZSAMPLE_DATA)
+    assert journaled.memory.journaling
+    for zm in (journaled, plain):
+        for turn in range(3):
+            zm.write_global(turn, 0x100 + turn)
+            zm.save_undo(zm.pc)
+    assert journaled.undos.entries() == plain.undos.entries()
+    assert journaled.memory.journal_position == 0  # trimmed at each undo point
+    journaled.write_global(9, 9)
+    assert journaled.undo() is True
+    assert journaled.read_global(9) == plain.read_global(9)
+    assert journaled.read_global(2) == 0x102
+
+
+def test_checkpoint_rollback(sample_zmachine):
+    zm = sample_zmachine
+    zm.write_global(3, 0x33)
+    pc = zm.pc
+    zm.checkpoint()
+    assert zm.memory.journaling
+    zm.write_global(3, 0x44)
+    zm.stack_push(1)
+    zm.rng.random()
+    zm.save_undo(0x1234)
+    zm.pc = 0x4000
+    assert zm.changes_since_checkpoint()
+    zm.rollback()
+    assert zm.read_global(3) == 0x33
+    assert zm.pc == pc
+    assert zm.frames[0].stack == []
+    assert len(zm.undos) == 0
+    assert zm.changes_since_checkpoint() == {}
+    # a checkpoint can be rolled back to repeatedly
+    zm.write_global(3, 0x55)
+    zm.rollback()
+    assert zm.read_global(3) == 0x33
+    zm.release_checkpoint()
+    assert not zm.memory.journaling
+
+
+def test_changes_since_checkpoint(sample_zmachine):
+    zm = sample_zmachine
+    addr = zm.header.global_variable_addr + 2 * 5
+    zm.write_global(5, 0x0102)
+    zm.checkpoint()
+    zm.write_global(5, 0x0103)
+    assert zm.changes_since_checkpoint() == {addr + 1: (0x02, 0x03)}
+
+
+def test_rollback_without_checkpoint(sample_zmachine):
+    with pytest.raises(ValueError, match="No checkpoint"):
+        sample_zmachine.rollback()
+
+
+def test_clone_is_independent(sample_zmachine):
+    zm = sample_zmachine
+    zm.write_global(2, 0x22)
+    zm.stack_push(7)
+    zm.save_undo(zm.pc)
+    other = zm.clone()
+    assert other.story is zm.story
+    assert other.memory == zm.memory
+    assert other.pc == zm.pc
+    assert other.rng.random() == zm.rng.random()
+
+    other.write_global(2, 0x99)
+    other.stack_push(8)
+    other.pc = 0x4000
+    other.save_undo(other.pc)
+    assert zm.read_global(2) == 0x22
+    assert zm.frames[0].stack == [7]
+    assert zm.pc != 0x4000
+    assert len(zm.undos) == 1
+    assert len(other.undos) == 2
+    assert other.undo() is True
+    assert other.read_global(2) == 0x99
+
+
+def test_run_commands():
+    zm = ZMachine(ZSAMPLE_DATA)
+    ui = zm.ui
+    outputs = zm.run_commands(["open mailbox", "take leaflet"])
+    assert len(outputs) == 2
+    assert "West of House" in outputs[0]  # the intro comes with the first output
+    assert "leaflet" in outputs[0]
+    assert "Taken" in outputs[1]
+    assert zm.ui is ui
+    assert zm.run_commands([]) == []
+
+
+def test_run_with_budget_resumes_exactly():
+    from yazm.zui_web import InputRequested, ZUIWeb
+
+    whole = ZMachine(ZSAMPLE_DATA)
+    whole.ui = ZUIWeb()
+    with pytest.raises(InputRequested):
+        whole.run()
+
+    sliced = ZMachine(ZSAMPLE_DATA)
+    sliced.ui = ZUIWeb()
+    slices = 0
+    with pytest.raises(InputRequested):
+        while sliced.run(max_instructions=50) is RunStatus.BUDGET:
+            slices += 1
+    assert slices > 1
+    assert sliced.memory == whole.memory
+    assert sliced.pc == whole.pc
+    assert sliced.ui.get_output() == whole.ui.get_output()
+
+
+def test_run_deadline():
+    zm = ZMachine(ZSAMPLE_DATA)
+    pc = zm.pc
+    assert zm.run(deadline=time.monotonic() - 1) is RunStatus.DEADLINE
+    assert zm.pc == pc
+
+
+def _patched_machine(code: bytes) -> ZMachine:
+    """A machine for its own copy of the story with ``code`` at the initial pc.
+
+    Code lives in high memory, which belongs to the story and its decode
+    caches, so patching a running session's memory would not take effect.
+    """
+    data = bytearray(ZSAMPLE_DATA)
+    pc = ZMachine(ZSAMPLE_DATA).pc
+    data[pc : pc + len(code)] = code
+    return ZMachine(bytes(data))
+
+
+def test_decode_caches_filled_from_story_bytes():
+    # a session whose high memory differs must not put its decodes in the shared caches
+    story = load_story(bytes(ZSAMPLE_DATA))
+    altered = ZMachine(story)
+    pc = altered.pc
+    altered.memory[pc : pc + 8] = b"\xba" * 8
+    story.instructions.pop(pc, None)
+    assert altered.decode_instruction(pc).name != "quit"
+    assert repr(ZMachine(story).decode_instruction(pc)) == repr(Instruction.decode(ZMachine(ZSAMPLE_DATA), pc))
+
+
+def test_run_halts_on_quit():
+    zm = _patched_machine(b"\xba")  # quit
+    assert zm.run(max_instructions=10) is RunStatus.HALTED
+    assert zm.run() is RunStatus.HALTED
+
+
+def test_run_resumable_suspends_in_sread():
+    from yazm.zui_web import ZUIWeb
+
+    zm = ZMachine(ZSAMPLE_DATA)
+    zm.ui = ui = ZUIWeb()
+    status_updates = []
+    ui.set_status_bar = lambda left, right: status_updates.append(left)
+    vm = zm.run_resumable()
+    assert next(vm) is RunStatus.INPUT
+    assert "West of House" in ui.get_output()
+    read_pc = zm.pc
+    assert vm.send("open mailbox") is RunStatus.INPUT
+    assert "leaflet" in ui.get_output()
+    assert zm.pc == read_pc  # suspended inside the next read
+    assert len(status_updates) == 2  # once per read, not once per attempt
+    vm.send("quit")
+    with pytest.raises(StopIteration) as stop:
+        vm.send("y")
+    assert stop.value.value is RunStatus.HALTED
+
+
+def test_run_resumable_slices():
+    from yazm.zui_web import ZUIWeb
+
+    whole = ZMachine(ZSAMPLE_DATA)
+    whole.ui = ZUIWeb()
+    next(whole.run_resumable())
+
+    sliced = ZMachine(ZSAMPLE_DATA)
+    sliced.ui = ZUIWeb()
+    vm = sliced.run_resumable(max_instructions=50)
+    statuses = [next(vm)]
+    while statuses[-1] is RunStatus.BUDGET:
+        statuses.append(next(vm))
+    assert statuses[-1] is RunStatus.INPUT
+    assert len(statuses) > 2
+    assert sliced.memory == whole.memory
+    assert sliced.ui.get_output() == whole.ui.get_output()
+
+    looping = _patched_machine(b"\x8c\xff\xff")  # jump to itself
+    vm = looping.run_resumable(timeslice=0)
+    assert next(vm) is RunStatus.DEADLINE
+    assert next(vm) is RunStatus.DEADLINE
+
+
+def test_clone_leaves_checkpoint_with_parent(sample_zmachine):
+    zm = sample_zmachine
+    zm.checkpoint()
+    other = zm.clone()
+    assert not other.memory.journaling
+    with pytest.raises(ValueError, match="No checkpoint"):
+        other.rollback()
+    zm.rollback()
+
+
 # --- get_arguments with VARIABLE operand ---
 
 
@@ -693,10 +948,9 @@ def test_handle_input_debug(sample_zmachine):
 # --- run ---
 
 
-def test_run_quit(sample_zmachine):
-    zm = sample_zmachine
+def test_run_quit():
     # SHORT 0OP QUIT: raw_code = 0xBA
-    zm.memory.write_u8(zm.pc, 0xBA)
+    zm = _patched_machine(b"\xba")
     zm.run()
     assert zm.running is False
 
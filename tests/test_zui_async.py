@@ -0,0 +1,76 @@
+"""Tests for zui_async.py and ZMachine.run_async()."""
+
+import asyncio
+
+from yazm.enums import RunStatus
+from yazm.zmachine import ZMachine
+from yazm.zui_async import ZUIAsync
+
+from ._sample_data import ZSAMPLE_DATA
+
+
+def start(data=ZSAMPLE_DATA):
+    zm = ZMachine(data)
+    zm.ui = ZUIAsync()
+    return zm, asyncio.create_task(zm.run_async(slice_instructions=200))
+
+
+def test_play_through_run_async():
+    async def scenario():
+        zm, task = start()
+        assert "West of House" in await zm.ui.output()
+        assert "leaflet" in await zm.ui.command("open mailbox")
+        await zm.ui.command("quit")
+        assert await zm.ui.command("y") is None  # the game ended
+        assert await task is RunStatus.HALTED
+        assert zm.ui.finished
+
+    asyncio.run(scenario())
+
+
+def test_sessions_share_one_loop():
+    async def scenario():
+        games = [start() for _ in range(3)]
+        intros = await asyncio.gather(*(zm.ui.output() for zm, _ in games))
+        assert all("West of House" in intro for intro in intros)
+        replies = await asyncio.gather(
+            games[0][0].ui.command("open mailbox"), games[1][0].ui.command("north"), games[2][0].ui.command("look")
+        )
+        assert "leaflet" in replies[0]
+        assert "North of House" in replies[1]
+        assert "West of House" in replies[2]
+        for _, task in games:
+            task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_runaway_session_does_not_block_the_loop():
+    data = bytearray(ZSAMPLE_DATA)
+    pc = data[6] << 8 | data[7]
+    data[pc : pc + 3] = b"\x8c\xff\xff"  # jump to itself, forever
+
+    async def scenario():
+        _, runaway = start(bytes(data))
+        zm, task = start()
+        assert "West of House" in await asyncio.wait_for(zm.ui.output(), timeout=10)
+        assert "leaflet" in await asyncio.wait_for(zm.ui.command("open mailbox"), timeout=10)
+        runaway.cancel()
+        task.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_run_resumes_in_read():
+    async def scenario():
+        zm, task = start()
+        await zm.ui.output()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        task = asyncio.create_task(zm.run_async())
+        # back at the same prompt, without publishing its output a second time
+        assert "leaflet" in await zm.ui.command("open mailbox")
+        assert "Taken" in await zm.ui.command("take leaflet")
+        task.cancel()
+
+    asyncio.run(scenario())